@@ -4,21 +4,26 @@ FFmpeg実行ファイルのパスを設定するためのPyInstallerランタイ
 Changes:
 - 新しいffmpeg_handlerモジュールを使用するように更新
 - シンプルな実装に変更
+- _MEIPASS由来のパスをモジュール定数として一度だけ組み立てるように変更
 """
 
 import sys
 import os
-from pathlib import Path
 
-# PyInstallerで実行されている場合のみ処理を行う
-if hasattr(sys, '_MEIPASS'):
+# PyInstallerで実行されている場合のみ処理を行う（設定済みの場合は何もしない）
+if hasattr(sys, '_MEIPASS') and not os.environ.get("FFMPEG_BINARY"):
+    MEIPASS_DIR = sys._MEIPASS
+    SRC_DIR = os.path.join(MEIPASS_DIR, 'src')
+    FFMPEG_DIR = os.path.join(MEIPASS_DIR, 'resources', 'ffmpeg')
+    FFMPEG_EXE = os.path.join(FFMPEG_DIR, 'ffmpeg.exe')
+    FFPROBE_EXE = os.path.join(FFMPEG_DIR, 'ffprobe.exe')
+
     try:
-        # sys.pathにsrcディレクトリを追加してインポートできるようにする
+        # sys.pathにsrcディレクトリを追加してインポートできるようにする（追加済みならスキップ）
         # この処理はエラーハンドリングに含める（sys._MEIPASSが存在してもsrcが存在しない可能性がある）
-        src_path = os.path.join(sys._MEIPASS, 'src')
-        if os.path.exists(src_path):
-            sys.path.insert(0, src_path)
-        
+        if sys.path[:1] != [SRC_DIR] and os.path.isdir(SRC_DIR):
+            sys.path.insert(0, SRC_DIR)
+
         # FFmpegハンドラーをインポートしてセットアップ
         try:
             from src.utils.ffmpeg_handler import setup_ffmpeg
@@ -26,18 +31,21 @@ if hasattr(sys, '_MEIPASS'):
             print(f"FFmpeg設定完了: {ffmpeg_path}")
         except ImportError:
             # インポートに失敗した場合は、基本的なパス設定のみ行う
-            ffmpeg_path = Path(sys._MEIPASS) / "resources" / "ffmpeg" / "ffmpeg.exe"
-            ffprobe_path = Path(sys._MEIPASS) / "resources" / "ffmpeg" / "ffprobe.exe"
-            
-            if ffmpeg_path.exists():
-                os.environ["FFMPEG_BINARY"] = str(ffmpeg_path)
-                print(f"基本設定: FFMPEG_BINARY = {ffmpeg_path}")
+            # ディレクトリを一度だけ列挙し、ffmpeg/ffprobe両方の判定に使う
+            try:
+                bundled = set(os.listdir(FFMPEG_DIR))
+            except OSError:
+                bundled = set()
+
+            if 'ffmpeg.exe' in bundled:
+                os.environ.setdefault("FFMPEG_BINARY", FFMPEG_EXE)
+                print(f"基本設定: FFMPEG_BINARY = {os.environ['FFMPEG_BINARY']}")
             else:
-                print(f"警告: FFmpeg実行ファイルが見つかりません: {ffmpeg_path}")
-                
-            if ffprobe_path.exists():
-                os.environ["FFPROBE_BINARY"] = str(ffprobe_path)
-                print(f"基本設定: FFPROBE_BINARY = {ffprobe_path}")
-                
+                print(f"警告: FFmpeg実行ファイルが見つかりません: {FFMPEG_EXE}")
+
+            if 'ffprobe.exe' in bundled:
+                os.environ.setdefault("FFPROBE_BINARY", FFPROBE_EXE)
+                print(f"基本設定: FFPROBE_BINARY = {os.environ['FFPROBE_BINARY']}")
+
     except Exception as e:
-        print(f"FFmpegフックの実行中にエラーが発生しました: {e}")
\ No newline at end of file
+        print(f"FFmpegフックの実行中にエラーが発生しました: {e}")
@@ -9,25 +9,19 @@ Date: 2023-03-07
 
 import os
 import sys
-import tkinter as tk
-from tkinter import messagebox
 import logging
 import shutil
 import atexit
-import json
+import orjson
 from pathlib import Path
 from datetime import datetime
-from src.modules.audio_processor import AudioProcessor
-from pydub import AudioSegment
 from src.utils.ffmpeg_handler import setup_ffmpeg
 from src.utils.path_resolver import get_config_file_path
 
 # ロガーの初期化
+# ログ出力の設定は main() 内の setup_logging() で行う
 logger = logging.getLogger(__name__)
 
-# ログ出力を設定します（デバッグ用）
-logging.basicConfig(level=logging.DEBUG)
-
 # FFMPEGの初期設定
 ffmpeg_path, ffprobe_path = setup_ffmpeg()
 logger.info(f"FFmpeg設定: {ffmpeg_path}, ffprobe: {ffprobe_path}")
@@ -45,8 +39,44 @@ else:
 # 一時ディレクトリの設定
 TEMP_DIR = Path(os.getenv('TEMP', os.getenv('TMP', '.'))) / 'GiJiRoKu'
 
+# outputフォルダー内で中間ファイル（mp3, json）を置くサブディレクトリ名
+TEMP_OUTPUT_SUBDIRS = ("segments", "intermediate")
+# サブディレクトリ外に残った中間ファイルの拡張子
+TEMP_OUTPUT_EXTS = (".mp3", ".json")
+
+def _cleanup_output_tree(root):
+    """os.scandirでoutputフォルダーを走査し、中間ファイル用サブディレクトリはrmtree、
+    それ以外に残ったmp3/jsonは個別に削除する。削除したディレクトリ数とファイル数を返す
+    削除や走査に失敗したファイル・ディレクトリはログに記録して処理を続ける"""
+    removed_dirs = removed_files = 0
+    try:
+        it = os.scandir(root)
+    except OSError as ex:
+        logging.error(f"{root} の走査に失敗: {ex}")
+        print(f"{root} の走査に失敗: {ex}")
+        return removed_dirs, removed_files
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in TEMP_OUTPUT_SUBDIRS:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed_dirs += 1
+                else:
+                    sub_dirs, sub_files = _cleanup_output_tree(entry.path)
+                    removed_dirs += sub_dirs
+                    removed_files += sub_files
+            elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(TEMP_OUTPUT_EXTS):
+                try:
+                    os.unlink(entry.path)
+                    removed_files += 1
+                except OSError as ex:
+                    # 使用中などで削除できないファイルがあっても残りの削除は続ける
+                    logging.error(f"{entry.path} の削除に失敗: {ex}")
+                    print(f"{entry.path} の削除に失敗: {ex}")
+    return removed_dirs, removed_files
+
 def cleanup_temp():
-    """一時ファイルおよびoutputフォルダー内のmp3とjsonファイルのクリーンアップを行う"""
+    """一時ファイルおよびoutputフォルダー内の中間ファイル（mp3, json）のクリーンアップを行う"""
     # 一時ファイルのクリーンアップ
     try:
         if TEMP_DIR.exists():
@@ -56,44 +86,24 @@ def cleanup_temp():
         logging.error(f"一時ファイルの削除中にエラーが発生しました: {e}")
         print(f"一時ファイルの削除中にエラーが発生しました: {e}")
 
-    # outputフォルダー内のmp3とjsonファイルの削除
+    # outputフォルダー内の中間ファイル用サブディレクトリ（segments, intermediate）はまとめて削除し、
+    # それ以外の場所に残ったmp3とjsonの中間ファイルのみ個別に削除する
     try:
-        output_folder = Path("output")
-        if output_folder.exists():
-            for file in output_folder.rglob("*"):
-                if file.is_file() and file.suffix.lower() in [".mp3", ".json"]:
-                    try:
-                        file.unlink()
-                        logging.info(f"削除しました: {file}")
-                        print(f"削除しました: {file}")
-                    except Exception as ex:
-                        logging.error(f"{file} の削除に失敗: {ex}")
-                        print(f"{file} の削除に失敗: {ex}")
+        output_folder = "output"
+        if os.path.isdir(output_folder):
+            removed_dirs, removed_files = _cleanup_output_tree(output_folder)
+            logging.info(f"中間ファイルを削除しました: ディレクトリ {removed_dirs} 個, ファイル {removed_files} 個")
+            print(f"中間ファイルを削除しました: ディレクトリ {removed_dirs} 個, ファイル {removed_files} 個")
         else:
             logging.info("outputフォルダーが存在しません。")
             print("outputフォルダーが存在しません。")
     except Exception as e:
-        logging.error(f"outputフォルダー内のファイル削除中にエラー: {e}")
-        print(f"outputフォルダー内のファイル削除中にエラー: {e}")
-
-    # output/transcriptions/segments の削除
-    try:
-        segments_folder = Path("output/transcriptions/segments")
-        if segments_folder.exists() and segments_folder.is_dir():
-            shutil.rmtree(segments_folder)
-            logging.info(f"削除しました: {segments_folder}")
-            print(f"削除しました: {segments_folder}")
-        else:
-            logging.info(f"{segments_folder} は存在しません。")
-            print(f"{segments_folder} は存在しません。")
-    except Exception as ex:
-        logging.error(f"{segments_folder} の削除に失敗: {ex}")
-        print(f"{segments_folder} の削除に失敗: {ex}")
+        logging.error(f"outputフォルダー内の中間ファイル削除中にエラー: {e}")
+        print(f"outputフォルダー内の中間ファイル削除中にエラー: {e}")
 
     # srcディレクトリをPythonパスに追加
     sys.path.insert(0, str(BASE_DIR))
 
-from src.ui.main_window import MainWindow
 from src.utils.config import config_manager
 
 def setup_logging():
@@ -142,15 +152,15 @@ def load_config():
     try:
         # 統一されたパス解決ユーティリティを使用
         config_file = get_config_file_path()
-        logger.info(f"設定ファイルを読み込みます: {config_file.absolute()}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("設定ファイルを読み込みます: %s", config_file.absolute())
         
         if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # 設定内容のログ
-                transcription_method = config.get('transcription', {}).get('method', 'gpt4_audio')
-                logger.info(f"読み込まれた文字起こし方式: {transcription_method}")
-                return config
+            config = orjson.loads(config_file.read_bytes())
+            # 設定内容のログ
+            transcription_method = config.get('transcription', {}).get('method', 'gpt4_audio')
+            logger.info(f"読み込まれた文字起こし方式: {transcription_method}")
+            return config
         else:
             logger.warning(f"設定ファイルが見つかりません: {config_file}")
             return {}
@@ -162,24 +172,29 @@ def process_audio_file(input_file, config):
     """音声ファイルを処理する"""
     try:
         # 出力ディレクトリの設定
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 実行時刻は一度だけ取得し、出力ディレクトリ名と統合結果のファイル名で共有する
+        started_at = datetime.now()
+        timestamp = started_at.strftime("%Y%m%d_%H%M%S")
         output_dir = os.path.join("output", timestamp)
         logger.info(f"出力ディレクトリを設定: {output_dir}")
         
         # 文字起こし方式に応じて処理を分岐
         transcription_method = config.get('transcription', {}).get('method', 'whisper_gpt4')
         logger.info(f"文字起こし方式: {transcription_method}")
-        # 設定内容の詳細をログ出力
-        logger.info(f"設定内容のダンプ: {json.dumps(config, ensure_ascii=False, indent=2)}")
+        # 設定内容の詳細をログ出力（INFOが無効な場合はダンプ文字列を生成しない）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("設定内容のダンプ: %s", orjson.dumps(config, option=orjson.OPT_INDENT_2).decode("utf-8"))
         
         if transcription_method == "gemini":
             # Geminiを使用する場合はAudioProcessorを使用
+            from src.modules.audio_processor import AudioProcessor
             logger.info("Gemini APIを使用した処理を開始します")
             processor = AudioProcessor()
             output_file = processor.process_audio_file(
                 input_file=input_file,
                 output_dir=output_dir,
-                segment_length_seconds=config['transcription'].get('segment_length_seconds', 600)
+                segment_length_seconds=config['transcription'].get('segment_length_seconds', 600),
+                timestamp=started_at.strftime("%Y%m%d%H%M%S")
             )
         else:
             # 既存の処理（Whisper + GPT-4など）
@@ -196,6 +211,11 @@ def process_audio_file(input_file, config):
 
 def main():
     """アプリケーションのメインエントリーポイント"""
+    # GUI関連のモジュールは起動時にのみ読み込む
+    import tkinter as tk
+    from tkinter import messagebox
+    from src.ui.main_window import MainWindow
+
     try:
         # ロギングの設定
         print("ロギングの設定を開始します...")
@@ -240,7 +260,7 @@ def main():
         error_msg = f"致命的なエラーが発生しました: {str(e)}"
         logger.critical(error_msg, exc_info=True)
         # エラーダイアログを表示
-        tk.messagebox.showerror("エラー", error_msg)
+        messagebox.showerror("エラー", error_msg)
         raise
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
 import logging
 from pathlib import Path
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.ffmpeg_handler import split_media_fixed_duration
+from src.utils.config import config_manager
 from .transcriber import GeminiTranscriber
 from .result_integrator import ResultIntegrator
 
@@ -15,13 +17,14 @@ class AudioProcessor:
         self.integrator = ResultIntegrator()
         logger.info("AudioProcessorの初期化が完了しました")
 
-    def process_audio_file(self, input_file, output_dir, segment_length_seconds=600):
+    def process_audio_file(self, input_file, output_dir, segment_length_seconds=600, timestamp=None):
         """
         メディアファイル（動画または音声）の分割、文字起こし、結果統合までの一連の処理を実行
         Args:
             input_file (str): 入力メディアファイルのパス
             output_dir (str): 出力ディレクトリのパス
             segment_length_seconds (int): 分割する長さ（秒）
+            timestamp (str, optional): 統合結果のファイル名に使うタイムスタンプ（省略時は現在時刻）
         Returns:
             str: 最終出力ファイルのパス
         """
@@ -49,43 +52,57 @@ class AudioProcessor:
             logger.info(f"メディアを {len(split_files)} 個のセグメントに分割しました")
 
             # 文字起こしの実行
-            logger.info("=== 文字起こし処理を開始 ===")
-            all_transcriptions = []
-            for i, media_file in enumerate(split_files, 1):
-                logger.info(f"セグメント {i}/{len(split_files)} の文字起こしを実行中...")
-                transcription = self.transcriber.transcribe_audio(media_file)
-                
-                # セグメント情報を追加
-                for conv in transcription["conversations"]:
-                    conv["segment"] = i
-                    conv["segment_file"] = Path(media_file).name
-                
-                all_transcriptions.extend(transcription["conversations"])
-                logger.debug(f"セグメント {i} の会話エントリ数: {len(transcription['conversations'])}")
-
-            # 中間結果の保存
-            logger.info("=== 中間結果の保存 ===")
-            complete_result = {
-                "metadata": {
-                    "total_segments": len(split_files),
-                    "segment_length_seconds": segment_length_seconds,
-                    "original_file": str(input_file)
-                },
-                "conversations": all_transcriptions
+            # 各セグメントはAPIへの独立したリクエストのため並列に実行し、結果はセグメント順に受け取る
+            # 受け取った会話エントリは中間JSONと統合結果ファイルの両方へ即座に書き出し、全件をメモリに保持しない
+            max_workers = max(1, config_manager.get_config().transcription.max_parallel_transcriptions)
+            logger.info(f"=== 文字起こし処理を開始 (並列数: {max_workers}) ===")
+            metadata = {
+                "total_segments": len(split_files),
+                "segment_length_seconds": segment_length_seconds,
+                "original_file": str(input_file)
             }
+            # 中間ファイルは起動時のクリーンアップ対象となる intermediate ディレクトリに置く
+            intermediate_dir = output_path / "intermediate"
+            intermediate_dir.mkdir(exist_ok=True)
+            complete_json_path = intermediate_dir / "complete_transcription.json"
+            logger.info(f"中間結果を逐次保存: {complete_json_path}")
+            total_conversations = 0
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                    open(complete_json_path, "wb") as f, \
+                    self.integrator.open_writer(str(output_path), timestamp) as writer:
+                futures = [
+                    executor.submit(self._transcribe_segment, i, len(split_files), media_file)
+                    for i, media_file in enumerate(split_files, 1)
+                ]
 
-            complete_json_path = output_path / "complete_transcription.json"
-            logger.info(f"中間結果を保存: {complete_json_path}")
-            with open(complete_json_path, "w", encoding="utf-8") as f:
-                json.dump(complete_result, f, ensure_ascii=False, indent=2)
-            logger.debug(f"合計会話エントリ数: {len(all_transcriptions)}")
+                f.write(b'{"metadata":')
+                f.write(orjson.dumps(metadata))
+                f.write(b',"conversations":[')
 
-            # 最終結果の統合と保存
-            logger.info("=== 結果の統合処理を開始 ===")
-            final_output = self.integrator.integrate_results(
-                str(complete_json_path),
-                str(output_path)
-            )
+                try:
+                    for i, (media_file, future) in enumerate(zip(split_files, futures), 1):
+                        transcription = future.result()
+
+                        # セグメント情報を追加して書き出す
+                        for conv in transcription["conversations"]:
+                            conv["segment"] = i
+                            conv["segment_file"] = Path(media_file).name
+                            if total_conversations:
+                                f.write(b",")
+                            f.write(orjson.dumps(conv))
+                            writer.append(conv)
+                            total_conversations += 1
+
+                        logger.debug(f"セグメント {i} の会話エントリ数: {len(transcription['conversations'])}")
+                except Exception:
+                    # 失敗した場合、まだ開始していないセグメントのリクエストは送信しない
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+                f.write(b"]}")
+            logger.debug(f"合計会話エントリ数: {total_conversations}")
+            final_output = str(writer.output_path)
 
             # 一時ファイルのクリーンアップ
             logger.info("=== 一時ファイルのクリーンアップを開始 ===")
@@ -97,4 +114,19 @@ class AudioProcessor:
 
         except Exception as e:
             logger.error(f"メディア処理中にエラーが発生しました: {str(e)}", exc_info=True)
-            raise 
\ No newline at end of file
+            raise 
+
+    def _transcribe_segment(self, index, total, media_file):
+        """
+        1つのセグメントを文字起こしする（ワーカースレッドから呼び出される）
+        Args:
+            index (int): セグメント番号（1始まり）
+            total (int): セグメント総数
+            media_file (str): セグメントファイルのパス
+        Returns:
+            dict: 文字起こし結果の辞書
+        """
+        logger.info(f"セグメント {index}/{total} の文字起こしを実行中...")
+        transcription = self.transcriber.transcribe_audio(media_file)
+        logger.info(f"セグメント {index}/{total} の文字起こしが完了しました")
+        return transcription
@@ -1,10 +1,26 @@
 import os
-from pydub import AudioSegment
-from pydub.silence import detect_silence
+import bisect
+import subprocess
+import tempfile
+import numpy as np
 import logging
+from src.utils.ffmpeg_handler import get_ffmpeg_path, get_media_duration
 
 logger = logging.getLogger(__name__)
 
+# 無音検出用にデコードするPCMのサンプリングレート（モノラル・16bit）
+ANALYSIS_SAMPLE_RATE = 16000
+
+# 無音検出のパラメータ
+MIN_SILENCE_LEN_MS = 500  # 最小無音長（ミリ秒）
+SPLIT_SEARCH_MARGIN_MS = 10 * 1000  # 目標位置の前後にどれだけ余裕を持たせるか（ミリ秒）
+# まず厳しい閾値で検索し、見つからなければ徐々に寛容な閾値で再検索する（dBFS）
+SILENCE_THRESHOLDS = (-40, -35, -30, -25)
+
+# ストリームコピーで切り出せない場合の再エンコード設定（LAMEより高速なAAC）
+FALLBACK_EXTENSION = ".m4a"
+FALLBACK_CODEC_ARGS = ["-c:a", "aac", "-b:a", "128k"]
+
 class AudioSplitter:
     def __init__(self, segment_length_seconds=600):
         """
@@ -33,12 +49,20 @@ class AudioSplitter:
             # 出力ディレクトリが存在しない場合は作成
             os.makedirs(output_dir, exist_ok=True)
 
-            # 音声ファイルを読み込む
-            logger.info("音声ファイルを読み込み中...")
-            audio = AudioSegment.from_file(input_file_path)
-            audio_length_ms = len(audio)
-            audio_length_seconds = audio_length_ms / 1000
-            logger.info(f"音声ファイルを読み込みました: 長さ = {audio_length_seconds:.2f}秒")
+            ffmpeg_path = get_ffmpeg_path()
+            if not ffmpeg_path:
+                raise FileNotFoundError("FFmpegが見つかりません。音声分割は実行できません。")
+
+            # 音声の長さはffprobeで取得する（ファイル全体をデコードしない）
+            audio_length_seconds = get_media_duration(str(input_file_path))
+            if audio_length_seconds <= 0:
+                raise ValueError("メディアの長さを取得できませんでした。")
+            audio_length_ms = int(audio_length_seconds * 1000)
+            logger.info(f"音声の長さを取得しました: 長さ = {audio_length_seconds:.2f}秒")
+
+            # 無音検出用の音量エンベロープを全体に対して一度だけ計算する
+            logger.info("無音検出用の音量エンベロープを計算中...")
+            envelope = self._compute_rms_envelope(ffmpeg_path, input_file_path)
 
             # 理論上の分割位置を計算（例: 0, 300秒, 600秒, ...）
             theoretical_split_points = list(range(0, audio_length_ms, self.segment_length_ms))
@@ -50,7 +74,7 @@ class AudioSplitter:
                 logger.info(f"  理論位置 {i+1}: {pos/1000:.2f}秒")
 
             # 実際の分割位置を決定（無音検出による調整）
-            actual_split_points = self._determine_all_split_points(audio, theoretical_split_points)
+            actual_split_points = self._determine_all_split_points(envelope, theoretical_split_points)
 
             logger.info("実際の分割位置を決定しました:")
             for i, (theory, actual) in enumerate(zip(theoretical_split_points, actual_split_points)):
@@ -59,6 +83,8 @@ class AudioSplitter:
 
             # 分割されたファイルのパスを保存するリスト
             split_files = []
+            # セグメントは入力と同じコンテナで出力する（再エンコードしない）
+            source_extension = os.path.splitext(str(input_file_path))[1].lower() or FALLBACK_EXTENSION
 
             # 決定した分割位置に基づいて音声を分割
             segment_count = 0
@@ -69,15 +95,12 @@ class AudioSplitter:
 
                 logger.info(f"セグメント {segment_count} の処理を開始... (位置: {start_ms/1000:.2f}秒 - {end_ms/1000:.2f}秒)")
 
-                # セグメントを抽出
-                segment = audio[start_ms:end_ms]
-
                 # 出力ファイル名を生成
-                output_filename = f"segment_{segment_count}.mp3"
+                output_filename = f"segment_{segment_count}{source_extension}"
                 output_path = os.path.join(output_dir, output_filename)
 
-                # セグメントを保存
-                segment.export(output_path, format="mp3")
+                # FFmpegでセグメントを切り出して保存（コピーできない場合は拡張子が変わる）
+                output_path = self._export_segment(ffmpeg_path, input_file_path, start_ms, end_ms, output_path)
                 split_files.append(output_path)
 
                 segment_duration_seconds = (end_ms - start_ms) / 1000
@@ -90,22 +113,138 @@ class AudioSplitter:
             logger.error(f"音声分割中にエラーが発生しました: {str(e)}", exc_info=True)
             raise
 
-    def _determine_all_split_points(self, audio, theoretical_points):
+    def _compute_rms_envelope(self, ffmpeg_path, input_file_path):
+        """
+        音声全体を一度だけストリーミングでデコードし、1ミリ秒ごとの音量（RMS）を計算する
+        PCM全体は保持せず、チャンク単位で音量に変換する
+        Args:
+            ffmpeg_path (str): FFmpeg実行ファイルのパス
+            input_file_path (str): 入力音声ファイルのパス
+        Returns:
+            numpy.ndarray: 1ミリ秒ごとのRMS
+        """
+        cmd = [
+            ffmpeg_path,
+            "-v", "error",
+            "-i", str(input_file_path),
+            "-vn",
+            "-f", "s16le",
+            "-ac", "1",
+            "-ar", str(ANALYSIS_SAMPLE_RATE),
+            "-"
+        ]
+        logger.debug(f"FFmpegデコードコマンド: {' '.join(cmd)}")
+
+        bytes_per_ms = ANALYSIS_SAMPLE_RATE // 1000 * 2
+        chunk_size = bytes_per_ms * 60 * 1000  # 60秒分ずつ読み込む
+        envelopes = []
+        pending = b""
+
+        # stderrはパイプの詰まり（stdout読み込み中のデッドロック）を避けるため一時ファイルに受け、エラー時のみ読み出す
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            with process:
+                while True:
+                    chunk = process.stdout.read(chunk_size)
+                    if not chunk:
+                        break
+                    # 1ミリ秒に満たない端数は次のチャンクに持ち越す
+                    data = pending + chunk
+                    usable = len(data) - len(data) % bytes_per_ms
+                    pending = data[usable:]
+                    if usable:
+                        samples = np.frombuffer(data[:usable], dtype=np.int16)
+                        envelopes.append(self._compute_window_rms(samples, 1))
+
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", errors="replace")
+                logger.error(f"FFmpegエラー: {stderr}")
+                raise RuntimeError(f"無音検出用の音声デコードに失敗しました: {stderr}")
+
+        if not envelopes:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(envelopes)
+
+    def _export_segment(self, ffmpeg_path, input_file_path, start_ms, end_ms, output_path):
+        """
+        FFmpegで指定区間を切り出してセグメントファイルとして保存する
+        音声ストリームはそのままコピーし、コピーに失敗した場合のみAACに再エンコードする
+        Args:
+            ffmpeg_path (str): FFmpeg実行ファイルのパス
+            input_file_path (str): 入力音声ファイルのパス
+            start_ms (int): 開始位置（ミリ秒）
+            end_ms (int): 終了位置（ミリ秒）
+            output_path (str): 出力ファイルのパス
+        Returns:
+            str: 実際に保存したセグメントファイルのパス
+        """
+        base_cmd = [
+            ffmpeg_path,
+            "-y",
+            "-ss", f"{start_ms / 1000:.3f}",
+            "-i", str(input_file_path),
+            "-t", f"{(end_ms - start_ms) / 1000:.3f}",
+            "-vn"
+        ]
+        copy_cmd = base_cmd + ["-c:a", "copy", "-avoid_negative_ts", "make_zero", output_path]
+        try:
+            self._run_ffmpeg(copy_cmd)
+            return output_path
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"ストリームコピーでの切り出しに失敗したため再エンコードします: {e.stderr}")
+
+        fallback_path = os.path.splitext(output_path)[0] + FALLBACK_EXTENSION
+        encode_cmd = base_cmd + FALLBACK_CODEC_ARGS + [fallback_path]
+        try:
+            self._run_ffmpeg(encode_cmd)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpegエラー: {e.stderr}")
+            logger.error(f"FFmpegコマンド: {e.cmd}")
+            raise RuntimeError(f"セグメントの切り出しに失敗しました: {e.stderr}")
+        if fallback_path != output_path and os.path.exists(output_path):
+            os.remove(output_path)
+        return fallback_path
+
+    def _run_ffmpeg(self, cmd):
+        """
+        FFmpegコマンドを実行する
+        Args:
+            cmd (list): 実行するコマンド
+        Raises:
+            subprocess.CalledProcessError: FFmpegが異常終了した場合
+        """
+        logger.debug(f"FFmpeg切り出しコマンド: {' '.join(cmd)}")
+        subprocess.run(
+            cmd,
+            check=True,
+            capture_output=True,
+            text=True,
+            encoding='utf-8'
+        )
+
+    def _determine_all_split_points(self, envelope, theoretical_points):
         """
         全ての分割位置を事前に決定する
+        無音区間は音声全体に対して閾値ごとに一度だけ検出し、各分割位置では二分探索で参照する
         Args:
-            audio (AudioSegment): 音声データ
+            envelope (numpy.ndarray): 音声全体の1ミリ秒ごとのRMS
             theoretical_points (list): 理論上の分割位置のリスト（ミリ秒）
         Returns:
             list: 実際の分割位置のリスト（ミリ秒）
         """
         actual_points = [theoretical_points[0]]  # 最初の位置（0）は固定
 
-        # 最初と最後以外の各分割位置について、無音検出による調整を行う
-        for i in range(1, len(theoretical_points) - 1):
-            target_ms = theoretical_points[i]
-            actual_point = self._find_optimal_split_point(audio, target_ms)
-            actual_points.append(actual_point)
+        if len(theoretical_points) > 2:
+            envelope_db = self._compute_envelope_db(envelope)
+            # 閾値ごとの無音区間（開始位置リスト, 終了位置リスト）。必要になった閾値だけ計算する
+            silence_index = {}
+
+            # 最初と最後以外の各分割位置について、無音検出による調整を行う
+            for i in range(1, len(theoretical_points) - 1):
+                target_ms = theoretical_points[i]
+                actual_point = self._find_optimal_split_point(envelope, envelope_db, silence_index, target_ms)
+                actual_points.append(actual_point)
 
         # 最後の位置は音声の終端で固定
         if len(theoretical_points) > 1:
@@ -113,121 +252,136 @@ class AudioSplitter:
 
         return actual_points
 
-    def _find_optimal_split_point(self, audio, target_ms):
+    def _find_optimal_split_point(self, envelope, envelope_db, silence_index, target_ms):
         """
         指定された目標位置周辺で最適な分割ポイント（無音区間）を見つける
         Args:
-            audio (AudioSegment): 音声データ
+            envelope (numpy.ndarray): 音声全体の1ミリ秒ごとのRMS
+            envelope_db (numpy.ndarray): 音声全体の1ミリ秒ごとの音量（dBFS）
+            silence_index (dict): 閾値ごとの無音区間のキャッシュ {閾値: (開始位置リスト, 終了位置リスト)}
             target_ms (int): 目標となる位置（ミリ秒）
         Returns:
             int: 実際の分割位置（ミリ秒）
         """
-        # 無音検出のパラメータ
-        min_silence_len = 500  # 最小無音長（ミリ秒）
-        silence_thresh = -30   # -40dBから-30dBに変更（より大きな音も「無音」と判定）
-        margin_seconds = 10    # 目標時間の前後にどれだけ余裕を持たせるか（秒）- 5秒から10秒に拡大
-        margin_ms = margin_seconds * 1000
-
         # 音声の終端を超えないように調整
-        target_ms = min(target_ms, len(audio))
+        audio_length_ms = len(envelope)
+        target_ms = min(target_ms, audio_length_ms)
 
-        # 探索範囲（目標位置の前後margin_ms）
-        search_start = max(0, target_ms - margin_ms)
-        search_end = min(len(audio), target_ms + margin_ms)
+        # 探索範囲（目標位置の前後SPLIT_SEARCH_MARGIN_MS）
+        search_start = max(0, target_ms - SPLIT_SEARCH_MARGIN_MS)
+        search_end = min(audio_length_ms, target_ms + SPLIT_SEARCH_MARGIN_MS)
 
         logger.debug(f"無音探索範囲: {search_start/1000:.2f}秒 - {search_end/1000:.2f}秒")
 
         # 探索範囲が十分でない場合は目標位置で分割
-        if search_end - search_start < min_silence_len * 2:
+        if search_end - search_start < MIN_SILENCE_LEN_MS * 2:
             logger.debug(f"探索範囲が狭すぎるため、目標位置で分割します: {target_ms/1000:.2f}秒")
             return target_ms
 
-        # 探索範囲の音声を抽出
-        search_segment = audio[search_start:search_end]
-
-        # まず厳しい閾値で検索し、見つからなければ徐々に寛容な閾値で再検索
-        thresholds = [-40, -35, -30, -25]
-        for thresh in thresholds:
-            silence_ranges = detect_silence(search_segment, min_silence_len=min_silence_len, silence_thresh=thresh)
-            if silence_ranges:
-                break
-
-        # デバッグ用に検出された無音区間の情報を詳細に出力
-        if silence_ranges:
-            logger.debug(f"検出された無音区間: {len(silence_ranges)}個")
-            for i, (start, end) in enumerate(silence_ranges):
-                logger.debug(f"  無音区間 {i+1}: {start/1000:.2f}秒 - {end/1000:.2f}秒 (長さ: {(end-start)/1000:.2f}秒)")
+        # 厳しい閾値から順に、探索範囲内で目標位置に最も近い無音区間の中央を探す
+        for thresh in SILENCE_THRESHOLDS:
+            if thresh not in silence_index:
+                ranges = self._detect_silence(envelope_db, MIN_SILENCE_LEN_MS, thresh)
+                silence_index[thresh] = ([start for start, _ in ranges], [end for _, end in ranges])
+            starts, ends = silence_index[thresh]
+
+            best_position = None
+            best_distance = None
+            # 探索範囲の開始位置より後で終わる最初の無音区間から、範囲内に始まる区間のみを調べる
+            for j in range(bisect.bisect_right(ends, search_start), len(starts)):
+                start = max(starts[j], search_start)
+                if start >= search_end:
+                    break
+                end = min(ends[j], search_end)
+                if end - start < MIN_SILENCE_LEN_MS:
+                    continue
+                mid_position = (start + end) // 2
+                distance = abs(mid_position - target_ms)
+                if best_distance is None or distance < best_distance:
+                    best_position = mid_position
+                    best_distance = distance
+
+            if best_position is not None:
+                logger.info(f"{target_ms/1000:.2f}秒付近で無音区間を検出しました: {best_position/1000:.2f}秒 (目標との差: {(best_position-target_ms)/1000:.2f}秒, 閾値: {thresh}dBFS)")
+                return best_position
 
         # 無音区間が見つからない場合は音量が最も小さい位置を探索
-        if not silence_ranges:
-            logger.info(f"{target_ms/1000:.2f}秒付近に無音区間が見つかりません。音量が最小の位置を探索します...")
-            min_volume_position = self._find_min_volume_position(search_segment)
-            actual_split_point = search_start + min_volume_position
-            logger.info(f"最小音量位置で分割します: {actual_split_point/1000:.2f}秒")
-            return actual_split_point
-
-        # 目標位置に最も近い無音区間を選択
-        best_position = self._select_best_silence(silence_ranges, target_ms - search_start)
-
-        # 実際の分割位置（絶対位置）
-        actual_split_point = search_start + best_position
-        logger.info(f"{target_ms/1000:.2f}秒付近で無音区間を検出しました: {actual_split_point/1000:.2f}秒 (目標との差: {(actual_split_point-target_ms)/1000:.2f}秒)")
-
+        logger.info(f"{target_ms/1000:.2f}秒付近に無音区間が見つかりません。音量が最小の位置を探索します...")
+        min_volume_position = self._find_min_volume_position(envelope[search_start:search_end])
+        actual_split_point = search_start + min_volume_position
+        logger.info(f"最小音量位置で分割します: {actual_split_point/1000:.2f}秒")
         return actual_split_point
 
-    def _select_best_silence(self, silence_ranges, target_position):
+    def _find_min_volume_position(self, audio_segment):
         """
-        複数の無音区間から目標位置に最も近いものを選択する
+        音声セグメント内で最も音量が小さい位置を見つける
+
         Args:
-            silence_ranges (list): 無音区間のリスト [(start, end), ...]
-            target_position (int): 目標位置（探索範囲の開始位置からの相対位置）
+            audio_segment (numpy.ndarray): 探索対象の1ミリ秒ごとのRMS
+
         Returns:
-            int: 選択された無音区間の中央位置（探索範囲の開始位置からの相対位置）
+            int: 最小音量位置（ミリ秒、セグメント開始位置からの相対位置）
         """
-        best_distance = float('inf')
-        best_position = target_position
-
-        for start, end in silence_ranges:
-            # 無音区間の中央位置
-            mid_position = (start + end) // 2
+        # 音量分析のためのウィンドウサイズ（ミリ秒）
+        window_size = 100
 
-            # 目標位置との距離
-            distance = abs(mid_position - target_position)
+        n_windows = len(audio_segment) // window_size
+        if n_windows == 0:
+            return 0
 
-            if distance < best_distance:
-                best_distance = distance
-                # 無音区間の中央位置を使用
-                best_position = mid_position
+        # 1ミリ秒ごとのRMSからウィンドウごとのRMSを一括計算し、最小のウィンドウを選ぶ
+        windows = audio_segment[:n_windows * window_size].reshape(n_windows, window_size)
+        rms = np.sqrt(np.mean(windows * windows, axis=1))
+        min_index = int(np.argmin(rms))
 
-        return best_position
+        return min_index * window_size + window_size // 2
 
-    def _find_min_volume_position(self, audio_segment):
+    def _compute_window_rms(self, audio_segment, window_ms):
         """
-        音声セグメント内で最も音量が小さい位置を見つける
+        音声をウィンドウ単位に分割し、各ウィンドウの音量（RMS）を計算する
 
         Args:
-            audio_segment (AudioSegment): 探索対象の音声セグメント
+            audio_segment (numpy.ndarray): 対象の音声（16bit PCMのサンプル列）
+            window_ms (int): ウィンドウサイズ（ミリ秒）
 
         Returns:
-            int: 最小音量位置（ミリ秒、セグメント開始位置からの相対位置）
+            numpy.ndarray: ウィンドウごとのRMS（端数のウィンドウは切り捨て）
         """
-        # 音量分析のためのウィンドウサイズ（ミリ秒）
-        window_size = 100
+        samples = audio_segment.astype(np.float32)
+        window_samples = ANALYSIS_SAMPLE_RATE * window_ms // 1000
+        n_windows = len(samples) // window_samples
+        if n_windows == 0:
+            return np.empty(0, dtype=np.float32)
+        windows = samples[:n_windows * window_samples].reshape(n_windows, window_samples)
+        return np.sqrt(np.mean(windows * windows, axis=1))
+
+    def _compute_envelope_db(self, audio_segment):
+        """
+        1ミリ秒ごとのRMSをdBFSに変換する
+
+        Args:
+            audio_segment (numpy.ndarray): 1ミリ秒ごとのRMS
 
-        # 音量が最小の位置と値を保持する変数
-        min_volume = float('inf')
-        min_position = 0
+        Returns:
+            numpy.ndarray: 1ミリ秒ごとの音量（dBFS）
+        """
+        return 20 * np.log10(audio_segment / 32768 + 1e-9)
 
-        # セグメントを小さな区間に分けて音量を計算
-        for i in range(0, len(audio_segment) - window_size, window_size):
-            # 現在のウィンドウを取得
-            window = audio_segment[i:i+window_size]
-            # ウィンドウの音量（RMS）を計算
-            volume = window.rms
+    def _detect_silence(self, envelope_db, min_silence_len, silence_thresh):
+        """
+        音量エンベロープから閾値未満の区間を無音区間として検出する
 
-            # より小さい音量が見つかった場合、位置と値を更新
-            if volume < min_volume:
-                min_volume = volume
-                min_position = i + window_size // 2
+        Args:
+            envelope_db (numpy.ndarray): 1ミリ秒ごとの音量（dBFS）
+            min_silence_len (int): 最小無音長（ミリ秒）
+            silence_thresh (float): 無音と判定する閾値（dBFS）
 
-        return min_position
\ No newline at end of file
+        Returns:
+            list: 無音区間のリスト [(start, end), ...]（ミリ秒）
+        """
+        mask = (envelope_db < silence_thresh).astype(np.int8)
+        # 無音区間の開始・終了位置をランレングスで求める
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask, [0]))))
+        starts, ends = edges[0::2], edges[1::2]
+        keep = (ends - starts) >= min_silence_len
+        return [(int(start), int(end)) for start, end in zip(starts[keep], ends[keep])]
@@ -1,8 +1,15 @@
-import json
 import logging
+import mmap
+import shutil
+import orjson
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 logger = logging.getLogger(__name__)
 
 class ResultIntegrator:
@@ -10,6 +17,24 @@ class ResultIntegrator:
         """結果統合処理クラスの初期化"""
         logger.info("ResultIntegratorを初期化")
 
+    def open_writer(self, output_dir, timestamp=None):
+        """
+        会話エントリを1件ずつ追記できる統合結果ライターを開く
+        Args:
+            output_dir (str): 出力ディレクトリのパス
+            timestamp (str, optional): 出力ファイル名に使うタイムスタンプ（省略時は現在時刻）
+        Returns:
+            SummaryWriter: 統合結果ライター
+        """
+        # タイムスタンプ付きの出力ファイル名を生成
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        output_filename = f"transcription_summary_{timestamp}.txt"
+        output_path = Path(output_dir) / output_filename
+        logger.debug(f"生成された出力ファイル名: {output_filename}")
+        logger.info(f"統合結果を保存中: {output_path}")
+        return SummaryWriter(output_path)
+
     def integrate_results(self, input_json_path, output_dir):
         """
         complete_transcription.jsonを指定フォーマットのtxtファイルに変換
@@ -23,43 +48,38 @@ class ResultIntegrator:
             logger.info(f"結果統合を開始: {input_json_path}")
             logger.info(f"出力ディレクトリ: {output_dir}")
 
-            # 入力JSONの読み込み
-            logger.info("入力JSONファイルを読み込み中...")
-            with open(input_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            logger.debug(f"入力JSONの会話エントリ数: {len(data.get('conversations', []))}")
-
-            # 必要な情報のみを抽出
-            logger.info("会話データを整形中...")
-            simplified_data = {
-                "conversations": [
-                    {
-                        "speaker": conv["speaker"],
-                        "utterance": conv["utterance"]
-                    }
-                    for conv in data["conversations"]
-                ]
-            }
-            logger.debug(f"整形後の会話エントリ数: {len(simplified_data['conversations'])}")
-
-            # タイムスタンプ付きの出力ファイル名を生成
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            output_filename = f"transcription_summary_{timestamp}.txt"
-            output_path = Path(output_dir) / output_filename
-            logger.debug(f"生成された出力ファイル名: {output_filename}")
+            # 会話エントリを1件ずつ読み出し、必要な情報のみを逐次書き出す
+            with self.open_writer(output_dir) as writer:
+                for conv in self._iter_conversations(input_json_path):
+                    writer.append(conv)
 
-            # 結果を保存
-            logger.info(f"統合結果を保存中: {output_path}")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(simplified_data, f, ensure_ascii=False, indent=2)
-
-            logger.info(f"統合結果を保存しました: {output_path}")
-            return str(output_path)
+            return str(writer.output_path)
 
         except Exception as e:
             logger.error(f"結果の統合中にエラーが発生しました: {str(e)}", exc_info=True)
             raise
 
+    def _iter_conversations(self, input_json_path):
+        """
+        complete_transcription.jsonの会話エントリを順に返す
+        ijsonが利用可能な場合はストリーミングで解析し、そうでない場合はmmap経由でorjsonにより解析する
+        Args:
+            input_json_path (str): 入力JSONファイルのパス
+        Yields:
+            dict: 会話エントリ
+        """
+        with open(input_json_path, 'rb') as f:
+            if ijson is not None:
+                yield from ijson.items(f, 'conversations.item')
+                return
+
+            logger.debug("ijsonが利用できないため、mmapとorjsonで解析します")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    data = orjson.loads(view)
+
+        yield from data["conversations"]
+
     def cleanup_temp_files(self, segments_dir):
         """
         一時ファイル（セグメントファイルとその結果）のクリーンアップ
@@ -71,22 +91,75 @@ class ResultIntegrator:
             segments_path = Path(segments_dir)
             
             if segments_path.exists():
-                # 音声セグメントとJSONファイルを削除
-                file_count = 0
-                for file in segments_path.glob("*"):
-                    if file.suffix in ['.mp3', '.json']:
-                        file.unlink()
-                        file_count += 1
-                        logger.debug(f"一時ファイルを削除: {file}")
-                logger.info(f"合計 {file_count} 個の一時ファイルを削除しました")
-                
-                # 空のディレクトリを削除
-                if not any(segments_path.iterdir()):
-                    segments_path.rmdir()
-                    logger.debug(f"空のセグメントディレクトリを削除: {segments_path}")
+                # セグメントディレクトリには一時ファイルしか置かれないため、ディレクトリごと削除
+                shutil.rmtree(segments_path, ignore_errors=True)
+                logger.debug(f"セグメントディレクトリを削除: {segments_path}")
 
             logger.info("一時ファイルのクリーンアップが完了しました")
 
         except Exception as e:
             logger.error(f"一時ファイルのクリーンアップ中にエラーが発生しました: {str(e)}", exc_info=True)
-            raise 
\ No newline at end of file
+            raise
+
+
+class SummaryWriter:
+    """会話エントリを受け取った順に統合結果ファイルへ書き出すライター"""
+
+    def __init__(self, output_path):
+        """
+        Args:
+            output_path (Path): 出力ファイルのパス
+        """
+        self.output_path = Path(output_path)
+        # 書き込み中は一時ファイルに出力し、正常終了時のみ出力ファイル名に置き換える
+        self._part_path = self.output_path.with_name(self.output_path.name + ".part")
+        self.conversation_count = 0
+        self._file = open(self._part_path, 'wb')
+        self._file.write(b'{\n  "conversations": [')
+
+    def append(self, conv):
+        """
+        会話エントリから必要な情報のみを書き出す
+        Args:
+            conv (dict): 会話エントリ
+        """
+        if self.conversation_count:
+            self._file.write(b',')
+        self._file.write(b'\n    ')
+        self._file.write(orjson.dumps({
+            "speaker": conv["speaker"],
+            "utterance": conv["utterance"]
+        }))
+        self.conversation_count += 1
+
+    def close(self):
+        """JSONの末尾を書き込んでファイルを閉じ、出力ファイル名に置き換える"""
+        if self._file.closed:
+            return
+        try:
+            self._file.write(b'\n  ]\n}')
+        except BaseException:
+            self.discard()
+            raise
+        self._file.close()
+        self._part_path.replace(self.output_path)
+        logger.debug(f"整形後の会話エントリ数: {self.conversation_count}")
+        logger.info(f"統合結果を保存しました: {self.output_path}")
+
+    def discard(self):
+        """書き込み途中のファイルを閉じて削除する"""
+        if not self._file.closed:
+            self._file.close()
+        self._part_path.unlink(missing_ok=True)
+        logger.warning(f"処理が中断されたため、統合結果を保存しませんでした: {self.output_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # 途中までの結果を完成したファイルとして残さない
+            self.discard()
+        else:
+            self.close()
+        return False
@@ -1,11 +1,24 @@
 import os
 import logging
 import json
+import hashlib
+import tempfile
+import time
+import orjson
 from pathlib import Path
-from src.services.gemini_transcription import GeminiTranscriptionService, TranscriptionError
+from src.services.gemini_transcription import GeminiTranscriptionService, MediaInfo, TranscriptionError
 
 logger = logging.getLogger(__name__)
 
+# 文字起こし結果のキャッシュディレクトリ（起動時の一時ファイル削除の対象外）
+CACHE_DIR = Path(tempfile.gettempdir()) / "GiJiRoKu_transcribe_cache"
+# キャッシュの上限（件数と最終利用からの経過秒数）。超えた分は保存時に古いものから削除する
+CACHE_MAX_ENTRIES = 100
+CACHE_MAX_AGE_SEC = 30 * 24 * 60 * 60
+
+# 動画として扱う拡張子
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.webm'})
+
 class GeminiTranscriber:
     def __init__(self):
         """
@@ -25,16 +38,25 @@ class GeminiTranscriber:
         """
         try:
             logger.info(f"文字起こしを開始: {file_path}")
-            
+
             # 拡張子を確認して、動画ファイルかどうかを判定
-            file_extension = Path(file_path).suffix.lower()
-            is_video = file_extension in ['.mp4', '.avi', '.mov', '.mkv', '.webm']
+            file_extension = os.path.splitext(file_path)[1].lower()
+            is_video = file_extension in VIDEO_EXTS
+            # 存在と拡張子の検証はここで一度だけ行う
+            media = MediaInfo.probe(file_path, is_video=is_video)
+
+            # 同じ内容・同じモデル・同じプロンプトの文字起こし結果があれば再利用する
+            cache_path = CACHE_DIR / f"{self._cache_key(file_path)}.json"
+            cached = self._load_cache(cache_path)
+            if cached is not None:
+                logger.info(f"キャッシュ済みの文字起こし結果を使用します: {cache_path}")
+                return cached
             
             logger.info(f"ファイルタイプ: {'動画' if is_video else '音声'}, 拡張子: {file_extension}")
             
             # GeminiTranscriptionServiceを使用して文字起こし
             # process_mediaはprocess_audioを置き換えるメソッド（内部で動画か音声かを判定）
-            result = self.service.process_media(Path(file_path), is_video=is_video)
+            result = self.service.process_media(media)
             
             # formatted_textを取得
             response_text = result.get("formatted_text", "")
@@ -43,7 +65,7 @@ class GeminiTranscriber:
             # GeminiはJSON風のテキストを返すが、単なるテキストとして扱う
             # ここで字句解析（パース）はせずにオブジェクトを構築
             # 下流の処理では通常のpythonオブジェクトとして扱える
-            return {
+            transcription = {
                 "conversations": [
                     {
                         "speaker": "話者",
@@ -51,11 +73,86 @@ class GeminiTranscriber:
                     }
                 ]
             }
+            self._save_cache(cache_path, transcription)
+            return transcription
             
         except Exception as e:
             logger.error(f"文字起こし処理でエラーが発生: {str(e)}", exc_info=True)
             raise TranscriptionError(f"文字起こし処理に失敗: {str(e)}")
 
+    def _cache_key(self, file_path):
+        """
+        ファイル内容・文字起こしモデル・プロンプトからキャッシュキーを生成する
+        Args:
+            file_path (str): 音声または動画ファイルのパス
+        Returns:
+            str: キャッシュキー（16進文字列）
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.service.gemini_api.transcription_model, self.service.system_prompt):
+            data = part.encode("utf-8")
+            # 区切り位置が異なる入力が同じキーにならないよう長さも含める
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cache(self, cache_path):
+        """
+        キャッシュ済みの文字起こし結果を読み込む
+        Args:
+            cache_path (Path): キャッシュファイルのパス
+        Returns:
+            dict: 文字起こし結果（キャッシュがない場合はNone）
+        """
+        if not cache_path.exists():
+            return None
+        try:
+            cached = orjson.loads(cache_path.read_bytes())
+            # 最終利用日時として更新時刻を更新し、削除対象になりにくくする
+            os.utime(cache_path)
+            return cached
+        except Exception as e:
+            logger.warning(f"キャッシュの読み込みに失敗しました: {cache_path} - {str(e)}")
+            return None
+
+    def _save_cache(self, cache_path, transcription):
+        """
+        文字起こし結果をキャッシュに保存する（失敗しても処理は続行）
+        Args:
+            cache_path (Path): キャッシュファイルのパス
+            transcription (dict): 文字起こし結果
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(orjson.dumps(transcription))
+            logger.debug(f"文字起こし結果をキャッシュに保存しました: {cache_path}")
+        except Exception as e:
+            logger.warning(f"キャッシュの保存に失敗しました: {cache_path} - {str(e)}")
+        self._prune_cache()
+
+    def _prune_cache(self):
+        """
+        古いキャッシュを削除し、件数と経過時間を上限内に収める（失敗しても処理は続行）
+        """
+        try:
+            entries = []
+            for path in CACHE_DIR.glob("*.json"):
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except OSError:
+                    continue
+            entries.sort(reverse=True)
+            expire_before = time.time() - CACHE_MAX_AGE_SEC
+            for index, (mtime, path) in enumerate(entries):
+                if index >= CACHE_MAX_ENTRIES or mtime < expire_before:
+                    path.unlink(missing_ok=True)
+                    logger.debug(f"古いキャッシュを削除しました: {path}")
+        except Exception as e:
+            logger.warning(f"キャッシュの整理に失敗しました: {str(e)}")
+
     def save_transcription(self, transcription, output_file):
         """
         文字起こし結果をテキストファイルとして保存
@@ -0,0 +1,66 @@
+"""
+処理パイプラインで使うサービスの共有インスタンス
+
+サービスのコンストラクタは設定ファイルやプロンプトを読み込むため、ファイルごとに作り直さず使い回す。
+設定ファイルが更新された場合は、次回取得時に作り直す。
+"""
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.config import config_manager
+from .transcription import TranscriptionService
+from .csv_converter import CSVConverterService
+from .minutes import MinutesService
+from .meeting_title_service import MeetingTitleService
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_instances: Dict[Callable[[], Any], Any] = {}
+_config_mtime: Optional[int] = None
+
+
+def _settings_mtime() -> Optional[int]:
+    """設定ファイルの更新時刻を取得する（存在しない場合はNone）"""
+    try:
+        return os.stat(config_manager.config_file).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _get(factory: Callable[[], Any]) -> Any:
+    """共有インスタンスを取得する（未作成または設定変更後は作成する）"""
+    global _config_mtime
+    with _lock:
+        mtime = _settings_mtime()
+        if mtime != _config_mtime:
+            if _instances:
+                logger.info("設定ファイルが更新されたため、サービスを再作成します")
+            _instances.clear()
+            _config_mtime = mtime
+        instance = _instances.get(factory)
+        if instance is None:
+            instance = _instances[factory] = factory()
+        return instance
+
+
+def get_transcription() -> TranscriptionService:
+    """書き起こしサービスを取得する"""
+    return _get(TranscriptionService)
+
+
+def get_csv_converter() -> CSVConverterService:
+    """CSV変換サービスを取得する"""
+    return _get(CSVConverterService)
+
+
+def get_minutes() -> MinutesService:
+    """議事録生成サービスを取得する"""
+    return _get(MinutesService)
+
+
+def get_title() -> MeetingTitleService:
+    """会議タイトル生成サービスを取得する"""
+    return _get(MeetingTitleService)
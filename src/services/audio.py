@@ -4,9 +4,10 @@ import subprocess
 import tempfile
 import logging
 import time
+import atexit
 import sys
-from pydub import AudioSegment
-from typing import Tuple
+from typing import Optional, Tuple
+from ..utils.ffmpeg_handler import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,9 @@ class AudioProcessingError(Exception):
     pass
 
 class AudioProcessor:
+    # 終了時の一時ファイルクリーンアップを登録済みかどうか（一時ディレクトリは全インスタンスで共通）
+    _cleanup_registered = False
+
     def __init__(self, target_file_size: int = 25000000):  # 25MB
         self.target_file_size = target_file_size
         self.temp_dir = pathlib.Path(tempfile.gettempdir()) / "GiJiRoKu"
@@ -54,18 +58,35 @@ class AudioProcessor:
         os.environ["PATH"] = str(self.ffmpeg_path.parent) + os.pathsep + os.environ["PATH"]
         logger.info("FFmpegを環境変数PATHに追加しました")
 
+        # 一時ファイルのクリーンアップはプロセス終了時に一度だけ行う
+        if not AudioProcessor._cleanup_registered:
+            atexit.register(self.cleanup_temp_files)
+            AudioProcessor._cleanup_registered = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """withブロックを抜けた時点で一時ファイルをクリーンアップする"""
+        self.cleanup_temp_files()
+        return False
+
     def cleanup_temp_files(self, max_age_hours: int = 24) -> None:
         """一時ファイルのクリーンアップ"""
         try:
             current_time = time.time()
             logger.info(f"一時ファイルのクリーンアップを開始: {self.temp_dir}")
 
-            for temp_file in self.temp_dir.glob("*"):
-                file_age = current_time - temp_file.stat().st_mtime
-                logger.debug(f"一時ファイルをチェック: {temp_file} (経過時間: {file_age/3600:.1f}時間)")
-                if file_age > max_age_hours * 3600:
-                    logger.info(f"古い一時ファイルを削除: {temp_file}")
-                    temp_file.unlink()
+            # DirEntryが保持する情報を使い、ファイルごとの追加のstatを避ける
+            with os.scandir(self.temp_dir) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
+                    logger.debug("一時ファイルをチェック: %s (経過時間: %.1f時間)", entry.path, file_age / 3600)
+                    if file_age > max_age_hours * 3600:
+                        logger.info("古い一時ファイルを削除: %s", entry.path)
+                        os.unlink(entry.path)
 
             logger.info("一時ファイルのクリーンアップが完了しました")
         except Exception as e:
@@ -78,6 +99,18 @@ class AudioProcessor:
             logger.info(f"入力ファイルサイズ: {input_file.stat().st_size:,} bytes")
             logger.info(f"入力ファイルの権限: {oct(os.stat(input_file).st_mode)[-3:]}")
 
+            # 音声ストリームのビットレートと長さから抽出後のサイズを見積もる（取得できない場合は抽出してから判定する）
+            audio_length_sec, bit_rate = self._probe_audio_stream(input_file)
+            if audio_length_sec is not None and bit_rate is not None:
+                estimated_size = int(bit_rate * audio_length_sec / 8)
+                logger.info(f"抽出後の推定音声ファイルサイズ: {estimated_size:,} bytes")
+                if estimated_size > self.target_file_size:
+                    # 圧縮が必要な場合は中間ファイルを作らず、入力から直接1回で圧縮する
+                    logger.info(f"音声ファイルの圧縮を開始します（目標サイズ: {self.target_file_size:,} bytes）")
+                    compressed_audio, compressed_size = self._compress_audio(input_file, audio_length_sec)
+                    logger.info(f"圧縮率: {(1 - compressed_size/estimated_size) * 100:.1f}%")
+                    return compressed_audio, True
+
             # 一時ファイルのパスを生成
             temp_audio = self.temp_dir / f"temp_audio_{os.urandom(4).hex()}{input_file.suffix}"
             logger.info(f"一時音声ファイルを作成: {temp_audio}")
@@ -85,18 +118,9 @@ class AudioProcessor:
             # 音声の抽出
             logger.info("FFmpegで音声抽出を開始")
             cmd = [str(self.ffmpeg_path), "-y", "-i", str(input_file), "-codec:a", "copy", "-vn", str(temp_audio)]
-            logger.debug(f"FFmpegコマンド: {' '.join(cmd)}")
-
-            result = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
-            )
-
-            if result.stderr:
-                logger.debug(f"FFmpeg stderr出力: {result.stderr}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("FFmpegコマンド: %s", " ".join(cmd))
+            run_ffmpeg(cmd)
 
             # ファイルサイズのチェック
             temp_size = temp_audio.stat().st_size
@@ -106,45 +130,21 @@ class AudioProcessor:
                 logger.info("音声ファイルのサイズは制限内です")
                 return temp_audio, False
 
-            # 圧縮が必要な場合
-            logger.info(f"音声ファイルの圧縮を開始します（目標サイズ: {self.target_file_size:,} bytes）")
-            audio_segment = AudioSegment.from_file(str(temp_audio))
-            audio_length_sec = len(audio_segment) / 1000
-            target_kbps = int(self.target_file_size * 8 / audio_length_sec / 1000 * 0.95)
-
-            logger.info(f"音声長: {audio_length_sec:.1f}秒")
-            logger.info(f"目標ビットレート: {target_kbps}kbps")
-
-            if target_kbps < 8:
-                logger.error(f"必要なビットレートが低すぎます: {target_kbps}kbps")
-                raise AudioProcessingError("必要なビットレートが低すぎます")
-
-            compressed_audio = self.temp_dir / f"compressed_audio_{os.urandom(4).hex()}.mp3"
-            logger.info(f"圧縮音声ファイルを作成: {compressed_audio}")
+            # サイズを見積もれなかった場合のみ、抽出済みのファイルを圧縮する
+            # 圧縮のビットレート計算に音声長が必要なため、抽出済みのファイルから取得する
+            temp_length_sec, _ = self._probe_audio_stream(temp_audio)
+            if temp_length_sec is not None:
+                audio_length_sec = temp_length_sec
+            if audio_length_sec is None:
+                raise AudioProcessingError(f"音声長を取得できませんでした: {temp_audio}")
 
-            cmd = [str(self.ffmpeg_path), "-y", "-i", str(temp_audio),
-                  "-codec:a", "libmp3lame", "-ar", "22050", "-ac", "1",
-                  "-q:a", "4", "-b:a", f"{target_kbps}k",
-                  str(compressed_audio)]
-            logger.debug(f"FFmpeg圧縮コマンド: {' '.join(cmd)}")
-
-            result = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
-            )
-
-            if result.stderr:
-                logger.debug(f"FFmpeg圧縮stderr出力: {result.stderr}")
+            logger.info(f"音声ファイルの圧縮を開始します（目標サイズ: {self.target_file_size:,} bytes）")
+            compressed_audio, compressed_size = self._compress_audio(temp_audio, audio_length_sec)
 
             # 元の一時ファイルを削除
             logger.info(f"元の一時ファイルを削除: {temp_audio}")
             temp_audio.unlink()
 
-            compressed_size = compressed_audio.stat().st_size
-            logger.info(f"圧縮後のファイルサイズ: {compressed_size:,} bytes")
             logger.info(f"圧縮率: {(1 - compressed_size/temp_size) * 100:.1f}%")
 
             return compressed_audio, True
@@ -159,10 +159,65 @@ class AudioProcessor:
             logger.error(f"エラータイプ: {type(e).__name__}")
             raise AudioProcessingError(f"音声処理に失敗しました: {str(e)}")
 
-    def __del__(self):
-        """デストラクタでの一時ファイルクリーンアップ"""
+    def _compress_audio(self, source: pathlib.Path, audio_length_sec: float) -> Tuple[pathlib.Path, int]:
+        """目標サイズに収まるビットレートでモノラルMP3に圧縮する（映像は除去）"""
+        target_kbps = int(self.target_file_size * 8 / audio_length_sec / 1000 * 0.95)
+
+        logger.info(f"音声長: {audio_length_sec:.1f}秒")
+        logger.info(f"目標ビットレート: {target_kbps}kbps")
+
+        if target_kbps < 8:
+            logger.error(f"必要なビットレートが低すぎます: {target_kbps}kbps")
+            raise AudioProcessingError("必要なビットレートが低すぎます")
+
+        compressed_audio = self.temp_dir / f"compressed_audio_{os.urandom(4).hex()}.mp3"
+        logger.info(f"圧縮音声ファイルを作成: {compressed_audio}")
+
+        cmd = [str(self.ffmpeg_path), "-y", "-i", str(source), "-vn",
+              "-codec:a", "libmp3lame", "-ar", "22050", "-ac", "1",
+              "-q:a", "4", "-b:a", f"{target_kbps}k",
+              str(compressed_audio)]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("FFmpeg圧縮コマンド: %s", " ".join(cmd))
+        run_ffmpeg(cmd)
+
+        compressed_size = compressed_audio.stat().st_size
+        logger.info(f"圧縮後のファイルサイズ: {compressed_size:,} bytes")
+        return compressed_audio, compressed_size
+
+    def _probe_audio_stream(self, path: pathlib.Path) -> Tuple[Optional[float], Optional[int]]:
+        """ffprobeでメディアの長さ（秒）と音声ストリームのビットレート（bps）を取得する（音声全体はデコードしない）
+        取得できなかった値はNoneとし、ffprobeが失敗しても例外は送出しない"""
+        cmd = [str(self.ffprobe_path), "-v", "error",
+               "-select_streams", "a:0",
+               "-show_entries", "stream=bit_rate:format=duration",
+               "-of", "default=noprint_wrappers=1",
+               str(path)]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ffprobeコマンド: %s", " ".join(cmd))
+
         try:
-            logger.info("デストラクタでの一時ファイルクリーンアップを開始")
-            self.cleanup_temp_files()
-        except Exception as e:
-            logger.error(f"デストラクタでのクリーンアップ中にエラーが発生しました: {str(e)}")
\ No newline at end of file
+            result = subprocess.run(
+                cmd,
+                check=True,
+                capture_output=True,
+                text=True,
+                encoding='utf-8'
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"ffprobeでの音声情報の取得に失敗しました: {path} ({getattr(e, 'stderr', None) or str(e)})")
+            return None, None
+
+        values = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+        try:
+            duration = float(values.get("duration", ""))
+        except ValueError:
+            # WebMなどでは長さがN/Aになることがある
+            logger.warning(f"音声長を取得できませんでした: {path} ({result.stdout.strip()})")
+            duration = None
+        if duration is not None and duration <= 0:
+            logger.warning(f"音声長が不正です: {duration}秒")
+            duration = None
+
+        bit_rate = values.get("bit_rate", "")
+        return duration, int(bit_rate) if bit_rate.isdigit() else None
@@ -2,6 +2,11 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Dict, Any
 
+from src.utils.file_utils import ensure_dir
+
+# 基底クラスで受け付ける音声ファイルの拡張子
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.mp4'})
+
 class TranscriptionError(Exception):
     """書き起こし処理中のエラーを表すカスタム例外"""
     pass
@@ -16,7 +21,7 @@ class TranscriptionService(ABC):
             output_dir (str): Output directory for transcriptions
         """
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.output_dir)
     
     @abstractmethod
     def process_audio(self, audio_file: Path) -> Dict[str, Any]:
@@ -42,8 +47,7 @@ class TranscriptionService(ABC):
         if not audio_file.exists():
             return False
         
-        valid_extensions = {'.mp3', '.wav', '.m4a', '.mp4'}
-        return audio_file.suffix.lower() in valid_extensions
+        return audio_file.suffix.lower() in AUDIO_EXTENSIONS
     
     def cleanup(self):
         """Clean up any temporary files or resources"""
@@ -1,13 +1,43 @@
 import os
 import json
 import csv
+import mmap
+import orjson
 import logging
 import pathlib
 import re
-from typing import Optional, List, Dict
+import itertools
+from typing import Callable, Optional, List, Dict, Iterable, Iterator, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+# テキストクリーニング用の変換テーブル（特殊文字・制御文字の削除と全角スペースの置換を1パスで行う）
+_TRANS_TABLE = dict.fromkeys(list(range(0x20)) + [0x7F] + list(b'"\\{}'), None)
+_TRANS_TABLE[ord('　')] = ' '
+
+# テキストクリーニング・会話抽出用の正規表現（呼び出しごとにキャッシュを引かないよう事前にコンパイル）
+_RE_WS = re.compile(r'\s+')
+# クリーニングが必要な文字（削除・置換対象の文字、連続した空白、半角スペース以外の空白）を含むかどうかの判定用
+_RE_NEEDS_CLEAN = re.compile(r'[\x00-\x1F\x7F"\\{}\u3000]|\s{2,}|[^\S ]')
+# より柔軟な正規表現パターン
+_RE_CONV = re.compile(
+    r'(?:"speaker"|speaker)\s*:?\s*"?([^",}\n]+)"?\s*,?\s*(?:"utterance"|utterance)\s*:?\s*"?([^"}\n][^}\n]*[^",}\n])"?',
+    re.MULTILINE | re.DOTALL
+)
+# 大きなファイルをmmap経由で検索するためのバイト列版
+_RE_CONV_BYTES = re.compile(_RE_CONV.pattern.encode("utf-8"), _RE_CONV.flags & ~re.UNICODE)
+
+# テキストベースの抽出でファイルを文字列として読み込む上限サイズ（これ以上はmmapで検索する）
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+# JSONとして解析できなかった場合にテキスト抽出へ切り替える例外
+_JSON_ERRORS = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson is not None else ())
+
 class CSVConversionError(Exception):
     """CSV変換関連のエラーを扱うカスタム例外クラス"""
     pass
@@ -19,45 +49,47 @@ class CSVConverterService:
 
     def _clean_text(self, text: str) -> str:
         """テキストのクリーニング処理"""
-        # 基本的な特殊文字の削除
-        text = re.sub(r'["\\\{\}]', '', text)
-        # 制御文字の削除
-        text = re.sub(r'[\x00-\x1F\x7F]', '', text)
-        # 全角スペースを半角に
-        text = text.replace('　', ' ')
+        # 既に整形済みのテキスト（大半の発話）は前後の空白を除くだけでよい
+        if not _RE_NEEDS_CLEAN.search(text):
+            return text.strip()
+        # 基本的な特殊文字・制御文字の削除と、全角スペースの半角への置換
+        text = text.translate(_TRANS_TABLE)
         # 複数の空白を1つに
-        text = re.sub(r'\s+', ' ', text)
+        text = _RE_WS.sub(' ', text)
         return text.strip()
 
-    def _extract_conversations(self, content: str) -> List[Dict[str, str]]:
-        """テキストから会話データを抽出"""
+    def _extract_conversations(self, content) -> List[Dict[str, str]]:
+        """テキストから会話データを抽出（文字列のほか、mmapなどのUTF-8バイト列も受け付ける）"""
         conversations = []
 
-        # より柔軟な正規表現パターン
-        pattern = r'(?:"speaker"|speaker)\s*:?\s*"?([^",}\n]+)"?\s*,?\s*(?:"utterance"|utterance)\s*:?\s*"?([^"}\n][^}\n]*[^",}\n])"?'
-
-        logger.debug(f"テキストの抽出を開始します。テキスト長: {len(content)}")
+        logger.debug("テキストの抽出を開始します。テキスト長: %d", len(content))
 
         # マルチラインで検索
-        matches = re.finditer(pattern, content, re.MULTILINE | re.DOTALL)
+        is_bytes = not isinstance(content, str)
+        matches = (_RE_CONV_BYTES if is_bytes else _RE_CONV).finditer(content)
         match_count = 0
 
         for match in matches:
             match_count += 1
-            speaker = self._clean_text(match.group(1))
-            utterance = self._clean_text(match.group(2))
+            speaker, utterance = match.group(1, 2)
+            if is_bytes:
+                # 一致した部分のみを文字列に変換する
+                speaker = speaker.decode("utf-8", errors="replace")
+                utterance = utterance.decode("utf-8", errors="replace")
+            speaker = self._clean_text(speaker)
+            utterance = self._clean_text(utterance)
 
             # バリデーション
             if not speaker or not utterance:
-                logger.warning(f"空の発話者または発話を検出: speaker='{speaker}', utterance='{utterance}'")
+                logger.warning("空の発話者または発話を検出: speaker='%s', utterance='%s'", speaker, utterance)
                 continue
 
             if len(speaker) > 100:
-                logger.warning(f"異常に長い発話者名を検出: {speaker[:50]}...")
+                logger.warning("異常に長い発話者名を検出: %.50s...", speaker)
                 continue
 
             if len(utterance) < 2:
-                logger.warning(f"異常に短い発話を検出: {utterance}")
+                logger.warning("異常に短い発話を検出: %s", utterance)
                 continue
 
             conversations.append({
@@ -68,6 +100,94 @@ class CSVConverterService:
         logger.info(f"抽出結果: 全{match_count}件中、有効な会話{len(conversations)}件")
         return conversations
 
+    def _iter_json_records(self, input_file: pathlib.Path) -> Iterator:
+        """
+        JSONファイルから会話レコードを順に返す
+        ijsonが利用可能な場合はストリーミングで解析し、ファイル全体をメモリに読み込まない
+        """
+        if ijson is None:
+            # orjsonはUTF-8のバイト列をそのまま解析できる
+            with open(input_file, "rb") as f:
+                json_data = orjson.loads(f.read())
+            logger.debug(f"JSONパース試行成功。型: {type(json_data)}")
+            yield from self._records_from_json(json_data)
+            return
+
+        with open(input_file, "rb") as f:
+            # 先頭の空白を読み飛ばし、トップレベルの型を判定する
+            first_char = f.read(1)
+            while first_char and first_char.isspace():
+                first_char = f.read(1)
+            f.seek(0)
+
+            if first_char == b"{":
+                logger.info("会話データをJSONオブジェクトから抽出しました")
+                yield from ijson.items(f, "conversations.item")
+            elif first_char == b"[":
+                items = ijson.items(f, "item")
+                first = next(items, None)
+                if first is None:
+                    return
+                # list の各要素が dict かつ "conversations" キーを持つかチェック
+                if isinstance(first, dict) and "conversations" in first:
+                    # ネストを平坦化
+                    logger.info("ネストされたJSON配列から会話データを抽出しました")
+                    for block in itertools.chain([first], items):
+                        yield from block.get("conversations", [])
+                else:
+                    # 単純なリスト形式の場合 (後方互換性のため残す)
+                    logger.info("単純なJSON配列からデータを抽出しました (注意: 意図しない形式の可能性あり)")
+                    yield first
+                    yield from items
+            else:
+                logger.warning("予期しないJSON構造です。テキスト抽出を試みます。")
+                raise json.JSONDecodeError("Unexpected JSON structure", "", 0)
+
+    def _records_from_json(self, json_data) -> list:
+        """解析済みのJSONデータから会話レコードのリストを取り出す"""
+        if isinstance(json_data, dict) and "conversations" in json_data:
+            logger.info("会話データをJSONオブジェクトから抽出しました")
+            return json_data["conversations"]
+        if isinstance(json_data, list):
+            # list の各要素が dict かつ "conversations" キーを持つかチェック
+            if json_data and isinstance(json_data[0], dict) and "conversations" in json_data[0]:
+                # ネストを平坦化
+                logger.info("ネストされたJSON配列から会話データを抽出しました")
+                return [item for block in json_data
+                             for item in block.get("conversations", [])]
+            # 単純なリスト形式の場合 (後方互換性のため残す)
+            logger.info("単純なJSON配列からデータを抽出しました (注意: 意図しない形式の可能性あり)")
+            return json_data
+        logger.warning(f"予期しないJSON構造です。型: {type(json_data)}。テキスト抽出を試みます。")
+        raise json.JSONDecodeError("Unexpected JSON structure", "", 0)
+
+    def _write_csv(self, output_file: pathlib.Path, records: Iterable) -> Tuple[int, int]:
+        """会話レコードを受け取った順にCSVへ書き出し、(全レコード数, 有効レコード数)を返す"""
+        total_records = 0
+        valid_records = 0
+
+        def rows():
+            nonlocal total_records, valid_records
+            for record in records:
+                total_records += 1
+                # recordが辞書であることを確認
+                if isinstance(record, dict):
+                    speaker = record.get("speaker", "").strip()
+                    utterance = record.get("utterance", "").strip()
+                    if speaker and utterance:  # 空のレコードは除外
+                        valid_records += 1
+                        yield (speaker, utterance)
+                else:
+                    logger.warning("予期しないレコード形式です: %s - %.50s...", type(record), record)
+
+        # CSVファイルの作成 - BOM付きUTF-8で保存
+        with open(output_file, "w", newline="", encoding="utf-8-sig") as csvfile:
+            csvwriter = csv.writer(csvfile)
+            csvwriter.writerow(["Speaker", "Utterance"])  # ヘッダー行
+            # 行の書き出しはcsvモジュールのC実装にまとめて任せる
+            csvwriter.writerows(rows())
+        return total_records, valid_records
+
     def convert_to_csv(self, input_file: pathlib.Path, output_file: Optional[pathlib.Path] = None) -> pathlib.Path:
         """書き起こしテキストをCSVに変換"""
         try:
@@ -82,80 +202,73 @@ class CSVConverterService:
             if output_file is None:
                 output_file = self.output_dir / f"{input_file.stem}.csv"
 
-            # 入力ファイルの読み込み
-            with open(input_file, "r", encoding="utf-8") as f:
-                content = f.read()
-                logger.debug(f"ファイル読み込み完了。サイズ: {len(content)}バイト")
-
-            data = []
-            try:
-                # まずJSONとしてパースを試みる
-                json_data = json.loads(content)
-                logger.debug(f"JSONパース試行成功。型: {type(json_data)}")
-
-                if isinstance(json_data, dict) and "conversations" in json_data:
-                    data = json_data["conversations"]
-                    logger.info("会話データをJSONオブジェクトから抽出しました")
-                elif isinstance(json_data, list):
-                    # list の各要素が dict かつ "conversations" キーを持つかチェック
-                    if json_data and isinstance(json_data[0], dict) and "conversations" in json_data[0]:
-                        # ネストを平坦化
-                        data = [item for block in json_data
-                                     for item in block.get("conversations", [])]
-                        logger.info("ネストされたJSON配列から会話データを抽出しました")
-                    else:
-                        # 単純なリスト形式の場合 (後方互換性のため残す)
-                        data = json_data
-                        logger.info("単純なJSON配列からデータを抽出しました (注意: 意図しない形式の可能性あり)")
-                else:
-                    logger.warning(f"予期しないJSON構造です。型: {type(json_data)}。テキスト抽出を試みます。")
-                    raise json.JSONDecodeError("Unexpected JSON structure", content, 0)
+            def extract_from_text():
+                # 大きなファイルは文字列に読み込まずmmap上で検索する
+                if input_file.stat().st_size < MMAP_THRESHOLD:
+                    with open(input_file, "r", encoding="utf-8") as f:
+                        return self._extract_conversations(f.read())
+                with open(input_file, "rb") as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._extract_conversations(mm)
 
-                logger.info(f"JSONデータの読み込みに成功しました。抽出したデータ数: {len(data)}")
+            return self._convert(output_file, lambda: self._iter_json_records(input_file), extract_from_text)
 
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSONパースに失敗: {str(e)}。テキストベースの抽出を試みます")
-                # テキストベースの抽出を実行
-                data = self._extract_conversations(content)
-                if data:
-                    logger.info(f"テキストベースの抽出に成功しました。{len(data)}件の会話を検出")
-                else:
-                    logger.warning("テキストベースの抽出でも会話が見つかりませんでした")
+        except Exception as e:
+            error_msg = f"変換処理中にエラーが発生しました: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            raise CSVConversionError(error_msg)
 
-            if not data:
+    def convert_text_to_csv(self, text: str, output_file: pathlib.Path) -> pathlib.Path:
+        """読み込み済みの書き起こしテキストをCSVに変換（ファイルを読み直さない）"""
+        try:
+            logger.info(f"変換処理を開始します（メモリ上のテキスト {len(text)}文字）: {output_file}")
+            return self._convert(
+                output_file,
+                lambda: self._records_from_json(orjson.loads(text)),
+                lambda: self._extract_conversations(text),
+            )
+
+        except Exception as e:
+            error_msg = f"変換処理中にエラーが発生しました: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            raise CSVConversionError(error_msg)
+
+    def _convert(self, output_file: pathlib.Path, json_records: Callable[[], Iterable],
+                 extract_from_text: Callable[[], List[Dict[str, str]]]) -> pathlib.Path:
+        """JSONとしての解析を試み、会話が得られなければテキストベースの抽出でCSVを作成する"""
+        total_records = 0
+        try:
+            # まずJSONとして解析し、レコードを受け取った順にCSVへ書き出す
+            total_records, valid_records = self._write_csv(output_file, json_records())
+            if total_records:
+                logger.info(f"JSONデータの読み込みに成功しました。抽出したデータ数: {total_records}")
+            else:
+                logger.warning("JSONから会話データが見つかりませんでした。テキストベースの抽出を試みます")
+        except _JSON_ERRORS as e:
+            logger.warning(f"JSONパースに失敗: {str(e)}。テキストベースの抽出を試みます")
+
+        if not total_records:
+            # テキストベースの抽出を実行
+            data = extract_from_text()
+            if data:
+                logger.info(f"テキストベースの抽出に成功しました。{len(data)}件の会話を検出")
+            else:
+                logger.warning("テキストベースの抽出でも会話が見つかりませんでした")
+                # 途中まで書き出したCSVは残さない
+                if output_file.exists():
+                    output_file.unlink()
                 error_msg = "有効な会話データが見つかりませんでした"
                 logger.error(error_msg)
                 # ここで例外を発生させる方が後続処理に進まないため安全
                 raise CSVConversionError(error_msg)
+            total_records, valid_records = self._write_csv(output_file, data)
 
-            # CSVファイルの作成 - BOM付きUTF-8で保存
-            with open(output_file, "w", newline="", encoding="utf-8-sig") as csvfile:
-                csvwriter = csv.writer(csvfile)
-                csvwriter.writerow(["Speaker", "Utterance"])  # ヘッダー行
-
-                valid_records = 0
-                for record in data:
-                    # recordが辞書であることを確認
-                    if isinstance(record, dict):
-                        speaker = record.get("speaker", "").strip()
-                        utterance = record.get("utterance", "").strip()
-                        if speaker and utterance:  # 空のレコードは除外
-                            csvwriter.writerow([speaker, utterance])
-                            valid_records += 1
-                    else:
-                        logger.warning(f"予期しないレコード形式です: {type(record)} - {str(record)[:50]}...")
-
-            # 有効レコードがない場合、警告を出す
-            if valid_records == 0:
-                logger.warning(f"CSVファイルに有効なレコードが書き込まれませんでした: {output_file}")
-
-            logger.info(f"CSV変換が完了しました! 出力ファイル: {output_file}, 有効レコード数: {valid_records}")
-            return output_file
+        # 有効レコードがない場合、警告を出す
+        if valid_records == 0:
+            logger.warning(f"CSVファイルに有効なレコードが書き込まれませんでした: {output_file}")
 
-        except Exception as e:
-            error_msg = f"変換処理中にエラーが発生しました: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            raise CSVConversionError(error_msg)
+        logger.info(f"CSV変換が完了しました! 出力ファイル: {output_file}, 有効レコード数: {valid_records}")
+        return output_file
 
     def get_output_path(self, input_file: pathlib.Path) -> pathlib.Path:
         """出力ファイルパスの生成"""
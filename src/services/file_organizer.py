@@ -1,21 +1,31 @@
 import os
+import sys
 import shutil
 import json
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from pathlib import Path
 from ..utils.file_utils import FileUtils
 from ..utils.config import config_manager
 
+# 整理前の成果物が置かれる output 配下のサブディレクトリ
+OUTPUT_SUBDIRS = ('transcriptions', 'csv', 'minutes', 'title')
+
+# ファイル移動を並行して行う際の最大スレッド数
+MAX_MOVE_WORKERS = 4
+
 class FileOrganizer:
-    def __init__(self, debug_mode: bool = False):
+    def __init__(self, debug_mode: bool = False, parallel_io: bool = True):
         """
         ファイル整理機能の初期化
         Args:
             debug_mode (bool): デバッグモードフラグ
+            parallel_io (bool): ファイル移動を並行して行うかどうか（Falseの場合は定義順に1件ずつ処理）
         """
         self.debug_mode = debug_mode
+        self.parallel_io = parallel_io
         self.file_utils = FileUtils()
         self.config = config_manager.get_config()
         self.logger = logging.getLogger(__name__)
@@ -65,11 +75,19 @@ class FileOrganizer:
             str: 作成されたフォルダのパス
         """
         try:
-            # 必要なディレクトリの存在確認と作成
-            required_dirs = ['output', 'output/transcriptions', 'output/csv', 'output/minutes', 'output/title']
-            for dir_path in required_dirs:
-                if not os.path.exists(dir_path):
-                    os.makedirs(dir_path)
+            # 必要なディレクトリの存在確認と作成（outputの一覧を一度だけ取得して照合する）
+            try:
+                with os.scandir('output') as it:
+                    existing_dirs = {entry.name for entry in it if entry.is_dir()}
+            except FileNotFoundError:
+                os.makedirs('output')
+                existing_dirs = set()
+                if self.debug_mode:
+                    print("[DEBUG] 一時ディレクトリを作成: output")
+            for name in OUTPUT_SUBDIRS:
+                if name not in existing_dirs:
+                    dir_path = f"output/{name}"
+                    os.makedirs(dir_path, exist_ok=True)
                     if self.debug_mode:
                         print(f"[DEBUG] 一時ディレクトリを作成: {dir_path}")
 
@@ -138,37 +156,78 @@ class FileOrganizer:
             f"output/transcriptions/transcription_summary_{timestamp}_remapped.txt": f"{date}_{meeting_title}_書き起こし.txt",
         }
 
-        successful_copies = []
-
-        # ファイルごとの処理
-        for src, dst in files_to_process.items():
+        # 元ファイルのディレクトリごとに一度だけ一覧を取得し、存在確認はファイル名の照合で行う
+        existing_names = {}
+        for src_dir in {os.path.dirname(src) for src in files_to_process}:
             try:
-                if os.path.exists(src):
-                    dst_path = os.path.join(new_folder, dst)
-                    self.logger.info(f"ファイルをコピーします: {src} -> {dst_path}")
-                    
-                    # ファイルのコピー
-                    shutil.copy2(src, dst_path)
-                    successful_copies.append(src)
-                    self.logger.info(f"ファイルのコピーが完了しました: {dst_path}")
-                else:
-                    self.logger.warning(f"元ファイルが存在しません: {src}")
+                with os.scandir(src_dir) as it:
+                    existing_names[src_dir] = {entry.name for entry in it if entry.is_file()}
+            except OSError as e:
+                self.logger.warning(f"ディレクトリを参照できません: {src_dir} ({e})")
+                existing_names[src_dir] = set()
+
+        # 移動先ごとに移動元をまとめる（リマップ後のファイルは元のファイルと同じ移動先を持ち、定義順に後勝ちとなる）
+        moves_by_dst = {}
+        for src, dst in files_to_process.items():
+            if os.path.basename(src) in existing_names[os.path.dirname(src)]:
+                moves_by_dst.setdefault(os.path.join(new_folder, dst), []).append(src)
+            else:
+                self.logger.warning("元ファイルが存在しません: %s", src)
 
-            except Exception as e:
-                error_msg = f"ファイル {src} の処理中にエラーが発生しました: {e}"
-                self.logger.error(error_msg)
-                continue
+        # 別ボリュームへの移動ではコピーが発生するため、移動先の異なるファイル同士は並行して処理する
+        if self.parallel_io and len(moves_by_dst) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_MOVE_WORKERS, len(moves_by_dst))) as executor:
+                list(executor.map(self._move_all, moves_by_dst.keys(), moves_by_dst.values()))
+        else:
+            for dst_path, srcs in moves_by_dst.items():
+                self._move_all(dst_path, srcs)
 
-        # コピーに成功したファイルの削除
-        for src in successful_copies:
+    def _move_all(self, dst_path: str, srcs: List[str]) -> None:
+        """
+        同じ移動先を持つファイルを定義順に移動する
+        Args:
+            dst_path (str): 移動先のパス
+            srcs (List[str]): 移動元のパスのリスト
+        """
+        for src in srcs:
             try:
-                self.logger.info(f"元ファイルを削除します: {src}")
-                os.remove(src)
-                self.logger.info(f"元ファイルの削除が完了しました: {src}")
+                self.logger.info("ファイルを移動します: %s -> %s", src, dst_path)
+                self._move(src, dst_path)
+                self.logger.info("ファイルの移動が完了しました: %s", dst_path)
             except Exception as e:
-                error_msg = f"ファイル {src} の削除中にエラーが発生しました: {e}"
+                error_msg = f"ファイル {src} の処理中にエラーが発生しました: {e}"
                 self.logger.error(error_msg)
 
+    def _move(self, src: str, dst: str) -> None:
+        """
+        ファイルを移動する
+        同じボリューム内ではリネームのみで移動し、別ボリュームの場合はコピー後に元ファイルを削除する
+        Args:
+            src (str): 移動元のパス
+            dst (str): 移動先のパス
+        """
+        try:
+            os.replace(src, dst)
+        except OSError:
+            self._fastcopy(src, dst)
+            os.remove(src)
+
+    def _fastcopy(self, src: str, dst: str) -> None:
+        """
+        ファイルをメタデータごとコピーする
+        WindowsではCopyFileExWでOSにコピーを任せ、それ以外ではshutil.copy2（Linuxではsendfileを使用）でコピーする
+        Args:
+            src (str): コピー元のパス
+            dst (str): コピー先のパス
+        """
+        if sys.platform == "win32":
+            import ctypes
+            copy_file_ex = ctypes.windll.kernel32.CopyFileExW
+            if not copy_file_ex(os.path.abspath(src), os.path.abspath(dst), None, None, None, 0):
+                raise ctypes.WinError()
+            return
+        shutil.copy2(src, dst)
+
     def _handle_error(self, error: Exception) -> None:
         """
         エラー処理
@@ -2,7 +2,9 @@ import subprocess
 import os
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.paths import get_ffmpeg_path
+from src.utils.ffmpeg_handler import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +13,12 @@ class FormatConversionError(Exception):
     pass
 
 # 未対応フォーマットの拡張子リスト
-AUDIO_FORMATS = ['m4a', 'aac', 'flac', 'ogg']
+AUDIO_FORMATS = frozenset({'m4a', 'aac', 'flac', 'ogg'})
 # 動画フォーマットは変換せずそのまま使用するため、ここでは変換対象ではない
-VIDEO_FORMATS = ['mkv', 'mp4','avi', 'mov', 'flv']
+VIDEO_FORMATS = frozenset({'mkv', 'mp4', 'avi', 'mov', 'flv'})
+
+# 1回のFFmpeg実行で使うスレッド数（複数ファイルを並列変換する際にコアを取り合わないようにする）
+FFMPEG_THREADS = 2
 
 def get_ffmpeg_executable():
     """
@@ -33,20 +38,18 @@ def is_conversion_needed(file_path):
     """
     ファイルの拡張子から変換が必要かどうか判断する関数
     """
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lower().lstrip('.')
-    
-    # 動画フォーマットは変換しない方針に変更
-    if ext in VIDEO_FORMATS:
-        logger.info(f"ファイル {file_path} は動画ファイルのため変換不要です（形式: {ext}）")
-        return False
-    
-    if ext in AUDIO_FORMATS:
-        logger.info(f"ファイル {file_path} は変換が必要です（形式: {ext}）")
-        return True
-        
-    logger.info(f"ファイル {file_path} は変換不要です（形式: {ext}）")
-    return False
+    ext = os.path.splitext(file_path)[1][1:].lower()
+    needed = ext in AUDIO_FORMATS
+
+    if logger.isEnabledFor(logging.INFO):
+        if needed:
+            logger.info(f"ファイル {file_path} は変換が必要です（形式: {ext}）")
+        elif ext in VIDEO_FORMATS:
+            # 動画フォーマットは変換しない方針に変更
+            logger.info(f"ファイル {file_path} は動画ファイルのため変換不要です（形式: {ext}）")
+        else:
+            logger.info(f"ファイル {file_path} は変換不要です（形式: {ext}）")
+    return needed
 
 def get_output_filename(input_file, target_ext='mp3'):
     """
@@ -84,28 +87,25 @@ def convert_file(input_file):
     # FFmpegのコマンド作成
     if ext in AUDIO_FORMATS:
         # オーディオの場合の変換コマンド
-        cmd = f'"{ffmpeg_exec}" -y -i "{input_file}" -map 0:a:0 -acodec libmp3lame -q:a 2 "{output_file}"'
+        cmd = [ffmpeg_exec, "-y", "-i", input_file, "-threads", str(FFMPEG_THREADS),
+               "-map", "0:a:0", "-acodec", "libmp3lame", "-q:a", "2", output_file]
     else:
         # その他の形式の場合はそのまま返す（通常はここに到達しない）
         logger.warning(f"未知の形式のため変換をスキップ: {ext}")
         return input_file
 
-    logger.info(f"変換開始: {cmd}")
+    logger.info(f"変換開始: {' '.join(cmd)}")
 
-    # コマンドプロンプトで実行するため、shell=Trueを指定
+    # シェルを介さずFFmpegを直接起動する（引数はリストで渡すためクォートは不要）
+    # FFmpegの出力内容は実行中に逐次ログへ出力される
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        # FFmpegの出力内容をログに出力
-        logger.debug("FFmpeg標準出力: %s", result.stdout)
-        logger.debug("FFmpeg標準エラー出力: %s", result.stderr)
-
-        if result.returncode != 0:
-            error_msg = f"FFmpegエラー: returncode {result.returncode}"
-            logger.error(error_msg)
-            logger.error("FFmpegエラー詳細: %s", result.stderr)
-            raise FormatConversionError(f"FFmpegによる変換が失敗しました。: {result.stderr}")
-        else:
-            logger.info("変換に成功しました。")
+        run_ffmpeg(cmd)
+        logger.info("変換に成功しました。")
+    except subprocess.CalledProcessError as e:
+        error_msg = f"FFmpegエラー: returncode {e.returncode}"
+        logger.error(error_msg)
+        logger.error("FFmpegエラー詳細: %s", e.stderr)
+        raise FormatConversionError(f"FFmpegによる変換が失敗しました。: {e.stderr}")
     except subprocess.SubprocessError as e:
         error_msg = f"FFmpegの実行中にエラーが発生: {str(e)}"
         logger.error(error_msg)
@@ -124,21 +124,81 @@ def convert_file(input_file):
     logger.info(f"変換処理が完了しました: {output_file}")
     return output_file
 
+def convert_files(input_files, max_workers=None):
+    """
+    複数の入力ファイルを並列に変換し、入力と同じ順序で変換後のファイルパスのリストを返す。
+    変換対象のファイルはFFmpegの同時実行数ぶんのバッチに分け、バッチごとに1回のFFmpeg実行で
+    まとめて変換する（ファイルごとのプロセス起動を避ける）。
+    FFmpeg自体もマルチスレッドで動作するため、既定の同時実行数はCPUコア数の半分とする。
+    """
+    input_files = list(input_files)
+    results = {input_file: input_file for input_file in input_files}
+    targets = list(dict.fromkeys(f for f in input_files if is_conversion_needed(f)))
+    if not targets:
+        return input_files
+
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) // FFMPEG_THREADS)
+    max_workers = min(max_workers, len(targets))
+    batches = [targets[i::max_workers] for i in range(max_workers)]
+    logger.info(f"{len(targets)} 個のファイルを並列変換します (FFmpeg同時実行数: {max_workers})")
+
+    # 変換処理自体はFFmpegのプロセスで行われるため、呼び出し側はスレッドで十分
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch, outputs in zip(batches, executor.map(_convert_batch, batches)):
+            results.update(zip(batch, outputs))
+
+    return [results[input_file] for input_file in input_files]
+
+def _convert_batch(input_files):
+    """
+    複数の入力ファイルを1回のFFmpeg実行で変換し、変換後のファイルパスのリストを返す。
+    一括変換に失敗した場合は、失敗したファイルを特定できるよう1ファイルずつ変換し直す。
+    """
+    if len(input_files) == 1:
+        return [convert_file(input_files[0])]
+
+    ffmpeg_exec = get_ffmpeg_path()
+    output_files = [get_output_filename(input_file, target_ext='mp3') for input_file in input_files]
+
+    # 入力ごとに -i を指定し、各入力の最初の音声ストリームを対応する出力に割り当てる
+    cmd = [ffmpeg_exec, "-y"]
+    for input_file in input_files:
+        cmd += ["-i", input_file]
+    for index, output_file in enumerate(output_files):
+        cmd += ["-threads", str(FFMPEG_THREADS), "-map", f"{index}:a:0",
+                "-acodec", "libmp3lame", "-q:a", "2", output_file]
+
+    logger.info(f"一括変換開始: {len(input_files)} ファイル")
+    try:
+        run_ffmpeg(cmd)
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"一括変換に失敗したため、1ファイルずつ変換します: {e.stderr}")
+        return [convert_file(input_file) for input_file in input_files]
+
+    for output_file in output_files:
+        if not os.path.exists(output_file):
+            error_msg = f"変換後のファイルが見つかりません: {output_file}"
+            logger.error(error_msg)
+            raise FormatConversionError(error_msg)
+
+    logger.info(f"一括変換が完了しました: {', '.join(output_files)}")
+    return output_files
+
 def cleanup_file(file_path):
     """
     変換後の一時ファイルを削除する関数
     """
     logger.info(f"一時ファイルの削除を開始: {file_path}")
-    if os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-            logger.info(f"{file_path} の削除に成功しました。")
-        except Exception as e:
-            error_msg = f"{file_path} の削除に失敗: {str(e)}"
-            logger.error(error_msg)
-            raise FormatConversionError(error_msg)
-    else:
+    try:
+        os.remove(file_path)
+        logger.info(f"{file_path} の削除に成功しました。")
+    except FileNotFoundError:
         logger.warning(f"{file_path} は存在しません。")
+    except Exception as e:
+        error_msg = f"{file_path} の削除に失敗: {str(e)}"
+        logger.error(error_msg)
+        raise FormatConversionError(error_msg)
 
 if __name__ == '__main__':
     # テスト実行用のコード
@@ -146,15 +206,15 @@ if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
 
     if len(sys.argv) < 2:
-        logger.error("使用方法: python format_converter.py 入力ファイルパス")
+        logger.error("使用方法: python format_converter.py 入力ファイルパス [入力ファイルパス ...]")
         sys.exit(1)
 
-    input_path = sys.argv[1]
-    logger.info(f"入力ファイル: {input_path}")
+    input_paths = sys.argv[1:]
+    logger.info(f"入力ファイル: {', '.join(input_paths)}")
 
     try:
-        converted = convert_file(input_path)
-        logger.info(f"変換後のファイル: {converted}")
+        for converted in convert_files(input_paths):
+            logger.info(f"変換後のファイル: {converted}")
     except FormatConversionError as e:
         logger.error(f"変換エラー: {str(e)}")
         sys.exit(1)
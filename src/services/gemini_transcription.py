@@ -1,15 +1,42 @@
 import os
-import json
+import stat
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
 from src.utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError, MediaType
 from src.services.base_transcription import TranscriptionService
+from src.utils.file_cache import load_json, read_text
+from src.utils.file_utils import write_text
 
 logger = logging.getLogger(__name__)
 
+# 書き起こし可能な拡張子（動画形式も含む）
+VALID_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.mkv', '.webm'})
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """検証済みのメディアファイル情報"""
+    path: Path
+    is_video: bool
+    size: int
+
+    @classmethod
+    def probe(cls, media_file: Union[str, Path], is_video: bool = False) -> "MediaInfo":
+        """ファイルの存在と拡張子を1回のstatで検証してメディア情報を作成する"""
+        media_file = Path(media_file)
+        try:
+            st = os.stat(media_file)
+        except FileNotFoundError:
+            raise TranscriptionError(f"ファイルが見つかりません: {media_file}")
+        if not stat.S_ISREG(st.st_mode):
+            raise TranscriptionError(f"通常のファイルではありません: {media_file}")
+        if media_file.suffix.lower() not in VALID_EXTENSIONS:
+            raise TranscriptionError(f"サポートされていないファイル形式: {media_file.suffix}")
+        return cls(media_file, is_video, st.st_size)
+
 class GeminiTranscriptionService(TranscriptionService):
     """Gemini APIを使用した書き起こしサービス"""
     
@@ -29,8 +56,7 @@ class GeminiTranscriptionService(TranscriptionService):
     def _load_api_key(self) -> str:
         """Load Gemini API key from configuration"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = load_json(self.config_path)
             
             api_key = config.get('gemini_api_key')
             if not api_key:
@@ -45,8 +71,7 @@ class GeminiTranscriptionService(TranscriptionService):
         """Load system prompt for transcription"""
         try:
             prompt_path = Path("src/prompts/transcriptionGEMINI.txt")
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+            return read_text(prompt_path).strip()
         except Exception as e:
             logger.error(f"Failed to load system prompt: {str(e)}")
             raise TranscriptionError(f"Failed to load system prompt: {str(e)}")
@@ -63,29 +88,26 @@ class GeminiTranscriptionService(TranscriptionService):
         # 互換性のために残しておき、内部でprocess_mediaを呼び出す
         return self.process_media(audio_file, is_video=False)
         
-    def process_media(self, media_file: Path, is_video: bool = False) -> Dict[str, Any]:
+    def process_media(self, media_file: Union[Path, MediaInfo], is_video: bool = False) -> Dict[str, Any]:
         """動画または音声ファイルを処理して文字起こしを生成
         
         Args:
-            media_file (Path): 動画または音声ファイルへのパス
-            is_video (bool): 動画ファイルの場合はTrue、音声ファイルの場合はFalse
+            media_file (Union[Path, MediaInfo]): 動画または音声ファイルへのパス、または検証済みのメディア情報
+            is_video (bool): 動画ファイルの場合はTrue、音声ファイルの場合はFalse（MediaInfoを渡した場合は無視）
             
         Returns:
             Dict[str, Any]: ファイルパスやメタデータを含む文字起こし結果
         """
         try:
+            # 検証済みのメディア情報が渡された場合は、存在・拡張子のチェックを繰り返さない
+            if not isinstance(media_file, MediaInfo):
+                media_file = MediaInfo.probe(media_file, is_video=is_video)
+            is_video = media_file.is_video
+            media_file = media_file.path
+
             media_type = "動画" if is_video else "音声"
             logger.info(f"{media_type}ファイルの文字起こしを開始: {media_file}")
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            
-            # ファイルの存在チェック
-            if not media_file.exists():
-                raise TranscriptionError(f"ファイルが見つかりません: {media_file}")
-                
-            # 拡張子チェック
-            valid_extensions = {'.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.mkv', '.webm'}
-            if media_file.suffix.lower() not in valid_extensions:
-                raise TranscriptionError(f"サポートされていないファイル形式: {media_file.suffix}")
                 
             # Gemini APIを使用して文字起こし
             # APIにメディアタイプを指定
@@ -103,10 +125,7 @@ class GeminiTranscriptionService(TranscriptionService):
             
             # 文字起こし結果を保存
             formatted_output_path = Path(self.output_dir) / f"transcription_summary_{timestamp}.txt"
-            formatted_output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(formatted_output_path, "w", encoding="utf-8") as f:
-                f.write(formatted_text)
+            write_text(formatted_output_path, formatted_text)
             
             logger.info(f"{media_type}ファイルの文字起こしが完了しました: {media_file}")
             
@@ -131,52 +150,11 @@ class GeminiTranscriptionService(TranscriptionService):
         Returns:
             bool: 有効な場合はTrue、そうでない場合はFalse
         """
-        if not audio_file.exists():
-            logger.error(f"ファイルが見つかりません: {audio_file}")
-            return False
-        
-        # 拡張子のチェック - 動画形式も含める
-        valid_extensions = {'.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.mkv', '.webm'}
-        if audio_file.suffix.lower() not in valid_extensions:
-            logger.error(f"サポートされていないファイル形式: {audio_file.suffix}")
+        # 存在と拡張子のチェック - 動画形式も含める
+        try:
+            MediaInfo.probe(audio_file)
+        except TranscriptionError as e:
+            logger.error(str(e))
             return False
         
         return True
-
-    def _process_with_gemini(self, audio_file: Path, timestamp: str) -> Dict[str, Any]:
-        """Gemini方式での書き起こし処理"""
-        logger.info("Geminiで音声認識・整形を開始")
-        
-        try:
-            # 音声ファイルを文字列に変換 (互換性のため transcribe_audio を使用)
-            formatted_text = self.gemini_api.transcribe_audio(str(audio_file))
-            
-            if not formatted_text:
-                logger.error("音声認識・整形の結果が空です")
-                raise TranscriptionError("書き起こしの生成に失敗しました")
-            
-            logger.info(f"音声認識・整形完了（テキスト長: {len(formatted_text)}文字）")
-            
-            # 整形済みテキストを保存
-            formatted_output_path = Path(self.output_dir) / f"transcription_summary_{timestamp}.txt"
-            formatted_output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            try:
-                with open(formatted_output_path, "w", encoding="utf-8") as f:
-                    f.write(formatted_text)
-            except Exception as e:
-                logger.error(f"整形済みテキストの保存中にエラー: {str(e)}")
-                raise TranscriptionError(f"整形済みテキストの保存に失敗しました: {str(e)}")
-            
-            logger.info("Gemini方式での書き起こし処理が完了しました")
-            return {
-                "raw_text": "",  # Gemini方式では生テキストは生成されない
-                "formatted_text": formatted_text,
-                "raw_file": None,
-                "formatted_file": formatted_output_path,
-                "timestamp": timestamp
-            }
-            
-        except Exception as e:
-            logger.error(f"Gemini方式での処理中にエラー: {str(e)}")
-            raise TranscriptionError(f"Gemini方式での処理に失敗しました: {str(e)}") 
\ No newline at end of file
@@ -1,11 +1,49 @@
-import json
+import io
 import os
 import re
+import mmap
+import logging
 from datetime import datetime
-from src.utils.file_utils import FileUtils
+from itertools import islice
+from typing import Optional, Tuple
+
+import orjson
+
+from src.utils.file_utils import FileUtils, ensure_dir, extract_timestamp, write_text
+from src.utils.file_cache import read_text
 from src.utils.config import ConfigManager, config_manager
 from .title_generator import TitleGeneratorFactory, TitleGeneratorFactoryError, TitleGenerationError
 
+logger = logging.getLogger(__name__)
+
+# タイトルファイルの出力先
+TITLE_OUTPUT_DIR = os.path.join("output", "title")
+
+# タイトル生成に送る発話者マーカーの上限数
+SPEAKER_MARKER = '"speaker":'
+MAX_SPEAKER_MARKERS = 60
+_RE_SPEAKER_MARKER = re.compile(re.escape(SPEAKER_MARKER))
+_RE_SPEAKER_MARKER_BYTES = re.compile(re.escape(SPEAKER_MARKER.encode('utf-8')))
+
+# このサイズを超える書き起こしファイルはmmap上でマーカーを数える
+MMAP_THRESHOLD = 10 * 1024 * 1024
+
+
+def count_markers_up_to(text, pattern: re.Pattern, cap: int) -> Tuple[int, Optional[int]]:
+    """
+    マーカーを先頭から最大 cap+1 個まで数える（全文は走査しない）
+    Args:
+        text: 検索対象（str、またはbytesパターンの場合はbytes/mmap）
+        pattern: マーカーのパターン
+        cap: 判定に使う上限数
+    Returns:
+        Tuple[int, Optional[int]]: (見つかった数（最大cap+1）, 上限を超えた場合のcap個目のマーカー位置)
+    """
+    matches = list(islice(pattern.finditer(text), cap + 1))
+    if len(matches) > cap:
+        return len(matches), matches[cap - 1].start()
+    return len(matches), None
+
 class MeetingTitleService:
     def __init__(self):
         """
@@ -14,6 +52,8 @@ class MeetingTitleService:
         """
         self.file_utils = FileUtils()
         self.config_manager = config_manager
+        # タイトルの出力先はここで一度だけ作成する
+        ensure_dir(TITLE_OUTPUT_DIR)
 
     def _read_transcript_file(self, transcript_file_path: str) -> str:
         """
@@ -23,17 +63,17 @@ class MeetingTitleService:
         Returns:
             str: 書き起こしテキスト
         """
-        print(f"Reading transcript file: {transcript_file_path}")
+        logger.debug("Reading transcript file: %s", transcript_file_path)
         try:
-            with open(transcript_file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            # タイトル・議事録・振り返りの各段階で同じ書き起こしを読むため、キャッシュを利用する
+            return read_text(transcript_file_path)
         except FileNotFoundError:
             error_msg = f"Transcript file not found: {transcript_file_path}"
-            print(error_msg)
+            logger.error(error_msg)
             raise FileNotFoundError(error_msg)
         except Exception as e:
             error_msg = f"Error reading transcript file: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             raise
 
     def _extract_timestamp(self, transcript_file_path: str) -> str:
@@ -44,16 +84,16 @@ class MeetingTitleService:
         Returns:
             str: タイムスタンプ（YYYYMMDDhhmmss形式）
         """
-        print(f"Extracting timestamp from file: {transcript_file_path}")
+        logger.debug("Extracting timestamp from file: %s", transcript_file_path)
         try:
             # transcription_summary_YYYYMMDDhhmmss.txt からタイムスタンプを抽出
-            match = re.search(r'_(\d{14})', os.path.basename(transcript_file_path))
-            if match:
-                return match.group(1)
+            timestamp = extract_timestamp(transcript_file_path)
+            if timestamp:
+                return timestamp
             raise ValueError(f"Could not extract timestamp from filename: {transcript_file_path}")
         except Exception as e:
             error_msg = f"Error extracting timestamp: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             raise
 
     def _generate_title_file_path(self, timestamp: str) -> str:
@@ -65,7 +105,7 @@ class MeetingTitleService:
             str: タイトルファイルのパス
         """
         # output/title ディレクトリにタイトルファイルを作成
-        return os.path.join("output", "title", f"meetingtitle_{timestamp}.txt")
+        return os.path.join(TITLE_OUTPUT_DIR, f"meetingtitle_{timestamp}.txt")
 
     def _save_title(self, title_file_path: str, title: str) -> None:
         """
@@ -74,91 +114,101 @@ class MeetingTitleService:
             title_file_path: 保存先ファイルパス
             title: 生成されたタイトル
         """
-        print(f"Saving title to: {title_file_path}")
+        logger.debug("Saving title to: %s", title_file_path)
         try:
             # タイトルをプレーンテキストで保存
-            with open(title_file_path, 'w', encoding='utf-8') as f:
-                f.write(title)
-            print(f"Title saved successfully to: {title_file_path}")
+            write_text(title_file_path, title)
+            logger.info("Title saved successfully to: %s", title_file_path)
         except Exception as e:
             error_msg = f"Error saving title file: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             raise
 
-    def process_transcript_and_generate_title(self, transcript_file_path: str) -> str:
+    def _scan_large_transcript(self, transcript_file_path: str) -> Tuple[int, Optional[str]]:
+        """
+        大きな書き起こしファイルをmmap上で走査し、マーカー数とタイトル生成に送るテキストを求める
+        Args:
+            transcript_file_path: 書き起こしファイルのパス
+        Returns:
+            Tuple[int, Optional[str]]: (マーカー数（最大61）, 切り詰めたテキスト。切り詰め不要ならNone)
+        """
+        logger.debug("Scanning large transcript file with mmap: %s", transcript_file_path)
+        with open(transcript_file_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            marker_count, cutoff_index = count_markers_up_to(mm, _RE_SPEAKER_MARKER_BYTES, MAX_SPEAKER_MARKERS)
+            if cutoff_index is None:
+                return marker_count, None
+            # テキストモードで読んだ場合と同じ改行変換を行う
+            return marker_count, io.TextIOWrapper(io.BytesIO(mm[:cutoff_index]), encoding='utf-8').read()
+
+    def process_transcript_and_generate_title(self, transcript_file_path: str, transcript_text: Optional[str] = None) -> str:
         """
         書き起こしファイルからタイトルを生成して保存する統合処理
         Args:
             transcript_file_path: 書き起こしファイルのパス
+            transcript_text: 読み込み済みの書き起こしテキスト（指定時はファイルを読み込まない）
         Returns:
             str: 生成されたタイトルファイルのパス
         """
         try:
             # 1. 設定から書き起こし方式を取得
             config = self.config_manager.get_config()
-            print(f"[DEBUG] process_transcript_and_generate_title - config id: {id(config)}")
-            print(f"[DEBUG] process_transcript_and_generate_title - transcription.method: {config.transcription.method}")
             transcription_method = config.transcription.method
-            print(f"Using transcription method: {transcription_method}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"process_transcript_and_generate_title - config id: {id(config)}")
+                logger.debug(f"process_transcript_and_generate_title - transcription.method: {transcription_method}")
+            logger.debug("Using transcription method: %s", transcription_method)
             
             # 2. タイトルジェネレーターを作成
             title_generator = TitleGeneratorFactory.create_generator(transcription_method)
             
-            # 3. ファイル読み込み
-            transcript_text = self._read_transcript_file(transcript_file_path)
+            # 3. ファイル読み込み（呼び出し元がテキストを保持している場合は再読み込みしない）
+            # 大きなファイルはmmap上でマーカーを数え、送信する先頭部分だけをデコードする
+            text_for_title = None
+            if transcript_text is None and os.path.getsize(transcript_file_path) > MMAP_THRESHOLD:
+                marker_count, text_for_title = self._scan_large_transcript(transcript_file_path)
+            if text_for_title is None:
+                if transcript_text is None:
+                    transcript_text = self._read_transcript_file(transcript_file_path)
+                # 1回の走査でマーカーを数え、上限+1個見つかった時点で打ち切る
+                marker_count, cutoff_index = count_markers_up_to(transcript_text, _RE_SPEAKER_MARKER, MAX_SPEAKER_MARKERS)
+                # デフォルトは全文、上限を超えた場合は60回目のマーカー以降を削除する
+                text_for_title = transcript_text if cutoff_index is None else transcript_text[:cutoff_index]
             
             # --- 追加: 送信テキスト量の判定と準備 ---
-            marker = '"speaker":'
-            marker_count = transcript_text.count(marker)
-            text_for_title = transcript_text  # デフォルトは全文
+            marker = SPEAKER_MARKER
 
             if marker_count == 0:
-                print(f"[WARN] 発話者マーカー '{marker}' が見つかりませんでした。全文を送信します。")
-            elif marker_count > 60:  # 30から60に変更
-                print(f"[INFO] 発話者マーカーの出現回数が {marker_count} 回 (>60) です。")
-                # 61回目のマーカーの位置を見つける
-                current_index = -1
-                found_count = 0
-                for i in range(60):  # 30から60に変更
-                    current_index = transcript_text.find(marker, current_index + 1)
-                    if current_index == -1:
-                        # 60回見つかる前に終端に達した場合 (予期せぬケース)
-                        print(f"[WARN] 60回目の発話者マーカーが見つかりませんでした（{i+1}回目まで検出）。全文を使用します。")
-                        text_for_title = transcript_text # 念のため全文に戻す
-                        found_count = -1 # ループ脱出と後続処理のスキップフラグ
-                        break
-                    found_count = i + 1
-                
-                if found_count == 60: # 60回目が見つかった場合のみカット
-                    cutoff_index = current_index
-                    text_for_title = transcript_text[:cutoff_index]
-                    print(f"[INFO] 60回目の '{marker}' 以降を削除して送信します (切り詰め後 {len(text_for_title)} 文字)。")
+                logger.warning("発話者マーカー '%s' が見つかりませんでした。全文を送信します。", marker)
+            elif marker_count > MAX_SPEAKER_MARKERS:  # 30から60に変更
+                logger.info("発話者マーカーの出現回数が %d 回を超えています。", MAX_SPEAKER_MARKERS)
+                logger.info("60回目の '%s' 以降を削除して送信します (切り詰め後 %d 文字)。", marker, len(text_for_title))
             
             else: # 1 <= marker_count <= 60 の場合
-                print(f"[INFO] 発話者マーカーの出現回数が {marker_count} 回 (<=60) のため、全文を使用します。")
+                logger.info("発話者マーカーの出現回数が %d 回 (<=60) のため、全文を使用します。", marker_count)
             # --- 追加ここまで ---
             
             # 4. タイトル生成
-            print("Generating meeting title...")
+            logger.debug("Generating meeting title...")
             # 修正: title_generator に渡すテキストを変更
             title = title_generator.generate_title(text_for_title)
             
-            # JSONとして解析できない場合は、テキストとして扱う
-            try:
-                title_json = json.loads(title)
-                title = title_json.get("title", title)
-            except json.JSONDecodeError:
-                print("JSONパースに失敗。テキストベースの抽出を試みます")
+            # JSONオブジェクトらしい応答のみ解析し、それ以外はテキストとして扱う
+            stripped = title.lstrip()
+            if stripped.startswith('{'):
+                try:
+                    title_json = orjson.loads(stripped)
+                    if isinstance(title_json, dict):
+                        title = title_json.get("title", title)
+                except orjson.JSONDecodeError:
+                    logger.warning("JSONパースに失敗。テキストベースの抽出を試みます")
             
-            print(f"Generated title: {title}")
+            logger.info("Generated title: %s", title)
             
             # 5. タイトルファイル生成
             timestamp = self._extract_timestamp(transcript_file_path)
             title_file_path = self._generate_title_file_path(timestamp)
             
-            # タイトル保存前にディレクトリを作成
-            os.makedirs(os.path.dirname(title_file_path), exist_ok=True)
-            
             # 6. タイトル保存
             self._save_title(title_file_path, title)
             
@@ -166,9 +216,9 @@ class MeetingTitleService:
             
         except (TitleGeneratorFactoryError, TitleGenerationError) as e:
             error_msg = f"Error in title generation process: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             raise
         except Exception as e:
             error_msg = f"Unexpected error in title generation process: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             raise 
\ No newline at end of file
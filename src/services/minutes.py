@@ -1,13 +1,14 @@
-import os
 import sys
 import pathlib
 import logging
 from datetime import datetime
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
 
 from ..utils.summarizer_factory import SummarizerFactory, SummarizerFactoryError
 from ..utils.prompt_manager import prompt_manager
+from ..utils.file_cache import read_text
+from ..utils.file_utils import ensure_dir, write_text
 
 logger = logging.getLogger(__name__)
 
@@ -26,16 +27,18 @@ class MinutesService:
             config_path (str): 設定ファイルのパス
         """
         self.output_dir = pathlib.Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.output_dir)
         self.config_path = config_path
         logger.info(f"出力ディレクトリを作成/確認: {self.output_dir}")
 
-    def generate_minutes(self, text: Union[str, Path], prompt_path: str = "src/prompts/minutes.txt") -> Dict[str, Any]:
+    def generate_minutes(self, text: Union[str, Path], prompt_path: str = "src/prompts/minutes.txt",
+                         transcript_text: Optional[str] = None) -> Dict[str, Any]:
         """議事録を生成する
 
         Args:
-            text (Union[str, Path]): 書き起こしテキストまたはテキストファイルのパス
+            text (Union[str, Path]): 書き起こしテキスト（str）またはテキストファイルのパス（Path）
             prompt_path (str): プロンプトファイルのパス（互換性のために残す）
+            transcript_text (Optional[str]): textがPathの場合に、読み込み済みのファイル内容（指定時はファイルを読み込まない）
 
         Returns:
             Dict[str, Any]: 生成結果（ファイルパスとメタデータを含む）
@@ -44,27 +47,26 @@ class MinutesService:
             MinutesError: 議事録生成に失敗した場合
         """
         try:
-            # 入力がPathオブジェクトの場合、ファイルの内容を読み込む
-            if isinstance(text, (str, Path)) and os.path.exists(str(text)):
-                logger.info(f"テキストファイルを読み込みます: {text}")
-                try:
-                    with open(text, 'r', encoding='utf-8') as f:
-                        input_text = f.read()
-                except UnicodeDecodeError:
-                    # UTF-8で失敗した場合、CP932で試行
-                    with open(text, 'r', encoding='cp932') as f:
-                        input_text = f.read()
-                logger.info(f"テキストファイルを読み込みました（{len(input_text)}文字）")
+            # 入力がPathオブジェクトの場合はファイルの内容を読み込み、文字列の場合は書き起こしテキストとして扱う
+            if isinstance(text, Path):
+                if transcript_text is not None:
+                    input_text = transcript_text
+                    logger.info(f"読み込み済みの書き起こしテキストを使用します: {text}（{len(input_text)}文字）")
+                else:
+                    logger.info(f"テキストファイルを読み込みます: {text}")
+                    # UTF-8で失敗した場合はCP932で試行（ファイルの読み込みは1回）
+                    input_text = read_text(text, fallback_encoding='cp932')
+                    logger.info(f"テキストファイルを読み込みました（{len(input_text)}文字）")
 
                 # 入力ファイル名から既存のタイムスタンプを抽出
-                input_path = Path(text)
-                if "transcription_summary_" in input_path.stem:
-                    timestamp = input_path.stem.split("transcription_summary_")[1]
+                if "transcription_summary_" in text.stem:
+                    # _remapped などの接尾辞も出力ファイル名に引き継ぐ
+                    timestamp = text.stem.split("transcription_summary_")[1]
                 else:
                     # タイムスタンプが見つからない場合は現在時刻を使用
                     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             else:
-                input_text = str(text)
+                input_text = text
                 timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
             # プロンプトの読み込み - prompt_managerを使用
@@ -86,8 +88,7 @@ class MinutesService:
             output_path = self.output_dir / f"transcription_summary_{timestamp}_minutes.md"
 
             # 議事録の保存
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(minutes)
+            write_text(output_path, minutes)
 
             logger.info(f"議事録を保存しました: {output_path}")
 
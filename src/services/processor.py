@@ -1,12 +1,10 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 # from .audio import AudioProcessor, AudioProcessingError
-from .transcription import TranscriptionService
-from .csv_converter import CSVConverterService
-from .minutes import MinutesService
-from .format_converter import convert_file, cleanup_file, FormatConversionError
-from .meeting_title_service import MeetingTitleService
+from .format_converter import convert_file, FormatConversionError
+from ._registry import get_transcription, get_csv_converter, get_minutes, get_title
 from .speaker_remapper import create_speaker_remapper
 from src.utils.config import config_manager
 from src.utils.video_compressor import VideoCompressor, VideoCompressionError
@@ -19,6 +17,8 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
     
     logger.info(f"処理開始 - 入力ファイル: {input_file}")
     logger.info(f"モード設定: {modes}")
+    # 1ファイルの処理中は同じ設定を参照する
+    config = config_manager.get_config()
     
     # 追加: 変換フラグおよび変換後ファイル保持用変数の初期化
     conversion_performed = False
@@ -71,36 +71,39 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
             # 書き起こし処理（必須）
             if modes["transcribe"]:
                 logger.info("書き起こし処理を開始")
-                transcription_service = TranscriptionService()
+                transcription_service = get_transcription()
                 # 変換されたメディアファイルまたは元のメディアファイルを直接転送
                 transcription_result = transcription_service.process_audio(input_file)
                 results["transcription"] = transcription_result
                 
                 # 会議タイトル生成処理を追加
+                # タイトル生成はリマップ前の書き起こしのみを使うため、話者リマップと並行して実行する
+                title_executor = ThreadPoolExecutor(max_workers=1)
+                title_future = None
                 try:
                     logger.info("会議タイトル生成処理を開始")
-                    # タイトル出力ディレクトリの確認と作成
-                    title_output_dir = Path("output/title")
-                    if not title_output_dir.exists():
-                        title_output_dir.mkdir(parents=True, exist_ok=True)
-                        logger.info(f"タイトル出力ディレクトリを作成しました: {title_output_dir}")
-
-                    title_service = MeetingTitleService()
+                    # タイトル出力ディレクトリはサービスの初期化時に作成される
+                    title_service = get_title()
                     transcript_file_path = transcription_result.get("formatted_file")
                     if transcript_file_path:
-                        title_file_path = title_service.process_transcript_and_generate_title(str(transcript_file_path))
-                        results["meeting_title"] = {"file_path": title_file_path}
-                        logger.info(f"会議タイトル生成完了: {title_file_path}")
+                        # 書き起こし結果のテキストはファイルと同じ内容のため、再読み込みせずに渡す
+                        title_future = title_executor.submit(
+                            title_service.process_transcript_and_generate_title,
+                            str(transcript_file_path),
+                            transcription_result.get("formatted_text"),
+                        )
                     else:
                         logger.warning("書き起こしファイルのパスが見つかりません")
                 except Exception as e:
                     logger.error(f"会議タイトル生成中にエラーが発生: {str(e)}")
                     results["meeting_title"] = {"error": str(e)}
+                finally:
+                    title_executor.shutdown(wait=False)
                 
                 # 追加: スピーカーリマップ処理
                 try:
                     # 話者置換処理の設定を取得
-                    enable_speaker_remapping = config_manager.get_config().transcription.enable_speaker_remapping
+                    enable_speaker_remapping = config.transcription.enable_speaker_remapping
                     
                     if enable_speaker_remapping:
                         logger.info("スピーカーリマップ処理を開始")
@@ -121,17 +124,40 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
                     logger.error(f"スピーカーリマップ処理中にエラーが発生: {str(e)}")
                     results["speaker_remap"] = {"error": str(e)}
                 
+                # 会議タイトル生成の完了を待つ
+                if title_future is not None:
+                    try:
+                        title_file_path = title_future.result()
+                        results["meeting_title"] = {"file_path": title_file_path}
+                        logger.info(f"会議タイトル生成完了: {title_file_path}")
+                    except Exception as e:
+                        logger.error(f"会議タイトル生成中にエラーが発生: {str(e)}")
+                        results["meeting_title"] = {"error": str(e)}
+                
                 # CSV変換
                 logger.info("CSV変換を開始")
-                csv_converter = CSVConverterService()
-                csv_file = csv_converter.convert_to_csv(transcription_result["formatted_file"])
+                csv_converter = get_csv_converter()
+                formatted_file = Path(transcription_result["formatted_file"])
+                formatted_text = transcription_result.get("formatted_text")
+                if formatted_text is not None and "file_path" not in results.get("speaker_remap", {}):
+                    # リマップしていない場合、ファイルの内容は書き起こし結果のテキストと同じなので読み直さない
+                    csv_file = csv_converter.convert_text_to_csv(formatted_text, csv_converter.get_output_path(formatted_file))
+                else:
+                    csv_file = csv_converter.convert_to_csv(formatted_file)
                 results["csv"] = csv_file
             
             # 議事録生成
             if modes["minutes"]:
                 logger.info("議事録生成を開始")
-                minutes_service = MinutesService()
-                minutes_result = minutes_service.generate_minutes(transcription_result["formatted_file"])
+                minutes_service = get_minutes()
+                # リマップしていない場合、ファイルの内容は書き起こし結果のテキストと同じなので読み直さない
+                transcript_text = None
+                if "file_path" not in results.get("speaker_remap", {}):
+                    transcript_text = transcription_result.get("formatted_text")
+                minutes_result = minutes_service.generate_minutes(
+                    Path(transcription_result["formatted_file"]),
+                    transcript_text=transcript_text,
+                )
                 # 戻り値のキーを適切に取り扱う
                 results["minutes"] = minutes_result.get("file_path") or minutes_result.get("minutes_file")
                 if not results["minutes"]:
@@ -141,11 +167,10 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
             # 反省点抽出
             if modes["reflection"]:
                 logger.info("反省点抽出を開始")
-                minutes_service = MinutesService()
+                minutes_service = get_minutes()
                 
                 # 議事録ファイルの内容を読み込む
-                with open(results["minutes"], "r", encoding="utf-8") as f:
-                    minutes_content = f.read()
+                minutes_content = Path(results["minutes"]).read_text(encoding="utf-8")
                 
                 # 議事録から反省点を抽出
                 reflection_path = minutes_service.extract_reflection_points(minutes_content)
@@ -170,17 +195,18 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
         return results
     finally:
         # 一時ファイルのクリーンアップ
-        if conversion_performed and converted_file and converted_file.exists():
+        # 存在確認はせず、削除済みの場合も含めてunlinkの1回で済ませる
+        if conversion_performed and converted_file:
             try:
-                cleanup_file(str(converted_file))
+                Path(converted_file).unlink(missing_ok=True)
                 logger.info(f"変換一時ファイルを削除しました: {converted_file}")
-            except Exception as e:
+            except OSError as e:
                 logger.warning(f"変換一時ファイルの削除に失敗: {str(e)}")
         
         # 圧縮された一時ファイルのクリーンアップ
-        if compression_performed and compressed_file and compressed_file.exists():
+        if compression_performed and compressed_file:
             try:
-                compressed_file.unlink()
+                Path(compressed_file).unlink(missing_ok=True)
                 logger.info(f"圧縮一時ファイルを削除しました: {compressed_file}")
-            except Exception as e:
+            except OSError as e:
                 logger.warning(f"圧縮一時ファイルの削除に失敗: {str(e)}") 
\ No newline at end of file
@@ -10,23 +10,84 @@ Date: 2024-03-08
 
 import os
 import logging
-import json
 import re
+import shutil
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 
-from src.utils.new_gemini_api import GeminiAPI, GeminiAPIError
+import orjson
+
+from src.utils.new_gemini_api import GeminiAPIError, get_gemini_api
 from src.utils.config import config_manager
-from src.utils.prompt_manager import PromptManager
+from src.utils.prompt_manager import prompt_manager
+from src.utils.file_utils import write_text
+from src.utils.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# "speaker": "話者名" のパターン
+_SPEAKER_RE = re.compile(r'"speaker"\s*:\s*"([^"]*)"')
+# AIレスポンス中のJSONコードブロックの区切り
+_JSON_FENCE = "```json"
+_FENCE = "```"
+# 書き起こしJSONでの話者キーの標準の書式
+_SPEAKER_KEY = '"speaker": "'
+# 文字列置換を話者ごとに繰り返す方が正規表現より速い話者数の上限
+LITERAL_REPLACE_MAX_SPEAKERS = 3
+# マッピング先がこれらを含む場合は置換しない（不明な話者）
+_SKIP_NAME_PATTERNS = ["[不明]", "[", "unknown", "Unknown", "不明"]
+_SKIP_NAME_RE = re.compile('|'.join(re.escape(pattern) for pattern in _SKIP_NAME_PATTERNS))
+
+def _speaker_records(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """
+    解析済みの文字起こしデータから話者レコードのリストを取り出す
+
+    Args:
+        data (Any): 解析済みのJSONデータ
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: 話者レコードのリスト（該当する構造でない場合はNone）
+    """
+    if isinstance(data, dict):
+        data = data.get("conversations")
+    if isinstance(data, list) and all(isinstance(record, dict) for record in data):
+        return data
+    return None
+
+
+def _speaker_counts(records: Optional[List[Dict[str, Any]]], transcript_text: str) -> Counter:
+    """
+    レコード（なければテキスト）から話者名ごとの出現回数を1回の走査で集計する
+
+    出現回数の合計と一意な話者名の両方をこの結果から求め、テキストを何度も走査しないようにする
+    """
+    if records is not None:
+        return Counter(record["speaker"] for record in records if isinstance(record.get("speaker"), str))
+    return Counter(_SPEAKER_RE.findall(transcript_text))
+
+
+def _can_replace_literally(transcript_text: str, speaker_mapping: Dict[str, str]) -> bool:
+    """
+    正規表現を使わずに str.replace で話者名を置換できるかを判定する
+
+    話者数が少なく、すべての話者キーが標準の書式で、置換結果が別の置換対象にならない場合のみ可能
+    """
+    return (len(speaker_mapping) <= LITERAL_REPLACE_MAX_SPEAKERS
+            and speaker_mapping.keys().isdisjoint(speaker_mapping.values())
+            and transcript_text.count('"speaker"') == transcript_text.count(_SPEAKER_KEY))
+
+
 class SpeakerRemapperBase:
     """スピーカーリマップ処理の基底クラス"""
 
+    # 同じ書き起こしとプロンプトの組み合わせではAIを呼ばずに前回のマッピングを使う
+    _mapping_cache = ResponseCache("speaker_remap")
+
     def __init__(self):
         """初期化"""
-        self.prompt_manager = PromptManager()
+        # 設定ファイルとプロンプトの読み込みはモジュール共通のインスタンスでキャッシュされる
+        self.prompt_manager = prompt_manager
 
     def get_remap_prompt(self) -> str:
         """話者リマッププロンプトを取得"""
@@ -52,35 +113,45 @@ class SpeakerRemapperBase:
         with open(transcript_file, "r", encoding="utf-8") as f:
             transcript_text = f.read()
 
-        # テキストの基本情報をログに記録
-        transcript_length = len(transcript_text)
-        speaker_count = transcript_text.count('"speaker"')
-        logger.info(f"変換対象の文字起こしファイル: 長さ={transcript_length}文字, 話者出現回数={speaker_count}回")
+        # JSONとして解析できる場合は、話者名をデータ上で直接置き換える（できない場合は正規表現で処理する）
+        transcript_data = self._load_transcript_json(transcript_text)
+        records = _speaker_records(transcript_data)
+
+        # 話者名の出現をカウント
+        speaker_counts = _speaker_counts(records, transcript_text)
+        unique_speakers = set(speaker_counts)
 
-        # "speaker": パターンの出現をカウント
-        speaker_pattern = r'"speaker"\s*:\s*"([^"]*)"'
-        speakers = re.findall(speaker_pattern, transcript_text)
-        unique_speakers = set(speakers)
+        # テキストの基本情報をログに記録
+        logger.info(f"変換対象の文字起こしファイル: 長さ={len(transcript_text)}文字, 話者出現回数={sum(speaker_counts.values())}回")
 
         logger.info(f"変換前の一意な話者: {len(unique_speakers)}人 - {', '.join(sorted(unique_speakers))}")
 
         # AIによる話者マッピングの取得
         speaker_mapping = self._get_speaker_mapping(transcript_text)
 
-        # マッピング結果を表形式で分かりやすく表示
-        logger.info("【話者マッピング結果】")
-        logger.info("┌─────────────────┬─────────────────┐")
-        logger.info("│  元の話者名     │  マッピング後   │")
-        logger.info("├─────────────────┼─────────────────┤")
+        output_file = transcript_file.with_name(f"{transcript_file.stem}_remapped{transcript_file.suffix}")
+        if not speaker_mapping:
+            # 置換するものがないため、テキストを再エンコードせずにファイルをそのままコピーする
+            logger.warning("話者マッピングが空のため、元のファイルをそのままコピーします")
+            shutil.copyfile(transcript_file, output_file)
+            logger.info(f"話者リマップ処理が完了しました。出力ファイル: {output_file}")
+            return output_file
 
         # 元の話者がマッピングに含まれているか確認
-        mapped_speakers = set()
-        for speaker in sorted(unique_speakers):
-            mapped_to = speaker_mapping.get(speaker, "【変換なし】")
-            mapped_speakers.add(mapped_to)
-            logger.info(f"│ {speaker:<15} │ {mapped_to:<15} │")
-
-        logger.info("└─────────────────┴─────────────────┘")
+        mapped_speakers = {speaker_mapping.get(speaker, "【変換なし】") for speaker in unique_speakers}
+
+        # マッピング結果を表形式で分かりやすく表示（DEBUG出力時のみ組み立て、1回のログ出力にまとめる）
+        if unique_speakers and logger.isEnabledFor(logging.DEBUG):
+            lines = [
+                "【話者マッピング結果】",
+                "┌─────────────────┬─────────────────┐",
+                "│  元の話者名     │  マッピング後   │",
+                "├─────────────────┼─────────────────┤",
+            ]
+            lines.extend("│ %-15s │ %-15s │" % (speaker, speaker_mapping.get(speaker, "【変換なし】"))
+                         for speaker in sorted(unique_speakers))
+            lines.append("└─────────────────┴─────────────────┘")
+            logger.debug("\n".join(lines))
 
         # マッピングに含まれているが元のテキストに存在しない話者の警告
         for original in speaker_mapping:
@@ -88,11 +159,10 @@ class SpeakerRemapperBase:
                 logger.warning(f"警告: マッピングには「{original}」が含まれていますが、元のテキストには存在しません")
 
         # 話者名の置換処理
-        remapped_text = self._replace_speakers(transcript_text, speaker_mapping)
+        remapped_text = self._replace_speakers(transcript_text, speaker_mapping, transcript_data)
 
         # 変換後の話者情報をログ
-        after_speakers = re.findall(speaker_pattern, remapped_text)
-        after_unique_speakers = set(after_speakers)
+        after_unique_speakers = set(_speaker_counts(records, remapped_text))
 
         # 変換結果の概要を表示
         logger.info(f"変換後の一意な話者: {len(after_unique_speakers)}人 - {', '.join(sorted(after_unique_speakers))}")
@@ -107,10 +177,17 @@ class SpeakerRemapperBase:
             if extra:
                 logger.warning(f"マッピングになかったが存在する話者: {', '.join(extra)}")
 
-        # リマップ後のファイルを保存
-        output_file = transcript_file.with_name(f"{transcript_file.stem}_remapped{transcript_file.suffix}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(remapped_text)
+        # 置換が1件もなかった場合は元のテキストがそのまま返される
+        unchanged = remapped_text is transcript_text
+
+        # 元のテキストと解析済みデータは不要になったので、書き出し前に解放する
+        del transcript_text, transcript_data, records
+
+        # リマップ後のファイルを保存（変更がなければ再エンコードせずにファイルをコピーする）
+        if unchanged:
+            shutil.copyfile(transcript_file, output_file)
+        else:
+            write_text(output_file, remapped_text)
 
         logger.info(f"話者リマップ処理が完了しました。出力ファイル: {output_file}")
         return output_file
@@ -125,64 +202,149 @@ class SpeakerRemapperBase:
         Returns:
             Dict[str, str]: 話者名マッピング辞書 (例: {"話者A": "山田"})
         """
+        try:
+            remap_prompt = self.get_remap_prompt()
+            cache_key = ResponseCache.make_key(self._model_name(), remap_prompt, transcript_text)
+            cached_mapping = self._mapping_cache.get(cache_key)
+            if cached_mapping is not None:
+                logger.info("キャッシュ済みの話者マッピングを使用します")
+                return dict(cached_mapping)
+
+            ai_response = self._call_llm(f"{remap_prompt}\n\n{transcript_text}")
+
+            # レスポンスをパースしてマッピングを返す（失敗時の空マッピングはキャッシュしない）
+            speaker_mapping = self._parse_mapping_response(ai_response)
+            if speaker_mapping:
+                self._mapping_cache.set(cache_key, speaker_mapping)
+            return speaker_mapping
+        except GeminiAPIError as e:
+            logger.error(f"Gemini API呼び出し中にエラー: {str(e)}")
+            return {}
+        except Exception as e:
+            logger.error(f"話者マッピング取得中に予期せぬエラー: {str(e)}")
+            return {}
+
+    def _model_name(self) -> str:
+        """キャッシュキーに含めるモデル名（モデルを変更した場合に前回の結果を使わないため）"""
+        return ""
+
+    def _call_llm(self, prompt: str) -> str:
+        """
+        AIにプロンプトを送信して応答テキストを取得する
+
+        Args:
+            prompt (str): リマッププロンプトと文字起こしテキストを結合したプロンプト
+
+        Returns:
+            str: AIからのレスポンス
+        """
         raise NotImplementedError("This method should be implemented by subclasses")
 
-    def _replace_speakers(self, transcript_text: str, speaker_mapping: Dict[str, str]) -> str:
+    def _load_transcript_json(self, transcript_text: str) -> Any:
+        """
+        文字起こしテキストをJSONとして解析する
+
+        Args:
+            transcript_text (str): 文字起こしテキスト
+
+        Returns:
+            Any: 解析済みのデータ（話者レコードを含まない、またはJSONでない場合はNone）
+        """
+        try:
+            data = orjson.loads(transcript_text)
+        except orjson.JSONDecodeError:
+            logger.info("文字起こしテキストはJSONとして解析できないため、正規表現で話者名を置換します")
+            return None
+        if _speaker_records(data) is None:
+            logger.info("JSON内に話者レコードが見つからないため、正規表現で話者名を置換します")
+            return None
+        return data
+
+    def _replace_speakers(self, transcript_text: str, speaker_mapping: Dict[str, str],
+                          transcript_data: Any = None) -> str:
         """
         文字起こしテキスト内の話者名を置換する
 
         Args:
             transcript_text (str): 元の文字起こしテキスト
             speaker_mapping (Dict[str, str]): 話者名マッピング辞書
+            transcript_data (Any): 解析済みの文字起こしデータ（指定時はデータ上で置換してJSONとして書き出す）
 
         Returns:
             str: 話者名が置換されたテキスト
         """
         result_text = transcript_text
 
-        # 詳細なログ出力のために全体のマッピングをログに記録
-        logger.info(f"話者リマップ開始: 以下のマッピングを適用します:")
+        logger.info(f"話者リマップ開始: {len(speaker_mapping)}件のマッピングを適用します")
 
         # スキップする話者名のフィルタリング
-        skip_patterns = ["[不明]", "[", "unknown", "Unknown", "不明"]
         filtered_mapping = {}
         skipped_mapping = {}
 
         for old_name, new_name in speaker_mapping.items():
             # 特定のパターンを含む場合はスキップする
-            if any(pattern in new_name for pattern in skip_patterns):
+            if _SKIP_NAME_RE.search(new_name):
                 skipped_mapping[old_name] = new_name
-                logger.info(f"  - \"{old_name}\" → \"{new_name}\" (スキップします: 不明/unknownを含むため)")
             else:
                 filtered_mapping[old_name] = new_name
-                logger.info(f"  - \"{old_name}\" → \"{new_name}\"")
 
         if skipped_mapping:
             logger.warning(f"以下の{len(skipped_mapping)}件のマッピングはスキップされます (不明/unknownを含むため):")
             for old, new in skipped_mapping.items():
                 logger.warning(f"  - \"{old}\" → \"{new}\"")
 
+        if not filtered_mapping:
+            logger.info("適用可能なマッピングがありません")
+            return transcript_text
+
         # 変換カウントを記録する辞書
-        replacement_counts = {old: 0 for old in filtered_mapping.keys()}
+        replacement_counts = Counter({old: 0 for old in filtered_mapping})
 
         # JSON内の話者名を置換
-        for old_name, new_name in filtered_mapping.items():
-            # "speaker": "話者A" のようなパターンを探して置換
-            pattern = f'"speaker"\\s*:\\s*"{re.escape(old_name)}"'
-            replacement = f'"speaker": "{new_name}"'
-
-            # 置換前のテキストを保存
-            before_text = result_text
+        records = _speaker_records(transcript_data)
+        if records is not None:
+            # 解析済みのレコードの話者名を直接置き換える（発話内容中の文字列を誤って置換することがない）
+            for record in records:
+                speaker = record.get("speaker")
+                if isinstance(speaker, str) and speaker in filtered_mapping:
+                    record["speaker"] = filtered_mapping[speaker]
+                    replacement_counts[speaker] += 1
+            result_text = orjson.dumps(transcript_data).decode("utf-8")
+        else:
+            # 置換後の文字列はマッチごとに組み立てず、事前に作っておく
+            replacements = {old: f'{_SPEAKER_KEY}{new}"' for old, new in filtered_mapping.items()}
+
+            if _can_replace_literally(transcript_text, filtered_mapping):
+                # 話者名が少なく書式も統一されている場合は、正規表現より速い文字列置換を話者ごとに行う
+                for old_name, replacement in replacements.items():
+                    key = f'{_SPEAKER_KEY}{old_name}"'
+                    length_delta = len(replacement) - len(key)
+                    if length_delta:
+                        # 置換件数は文字数の増減から求め、件数を数えるためだけの走査を省く
+                        before_length = len(result_text)
+                        result_text = result_text.replace(key, replacement)
+                        replacement_counts[old_name] = (len(result_text) - before_length) // length_delta
+                    else:
+                        replacement_counts[old_name] = result_text.count(key)
+                        result_text = result_text.replace(key, replacement)
+            else:
+                # すべての話者名を1つのパターンにまとめ、テキストを1回だけ走査して置換する
+                # パターンは先頭がリテラルの "speaker" のため、正規表現エンジンが候補位置まで高速に読み飛ばす
+                pattern = re.compile(
+                    r'"speaker"\s*:\s*"(' + '|'.join(re.escape(old) for old in filtered_mapping) + r')"'
+                )
 
-            # 置換実行
-            result_text = re.sub(pattern, replacement, result_text)
+                def replace(match):
+                    old_name = match.group(1)
+                    replacement_counts[old_name] += 1
+                    return replacements[old_name]
 
-            # 置換回数を計算
-            count = before_text.count(f'"speaker": "{old_name}"')
-            actual_count = before_text.count(f'"speaker": "{old_name}"') - result_text.count(f'"speaker": "{old_name}"')
-            replacement_counts[old_name] = actual_count
+                result_text = pattern.sub(replace, result_text)
 
-            logger.info(f"  話者置換: \"{old_name}\" → \"{new_name}\"、{actual_count}件の置換 (検出: {count}件)")
+        # 話者ごとの詳細はDEBUGレベルでのみ出力する
+        if logger.isEnabledFor(logging.DEBUG):
+            for old_name, new_name in filtered_mapping.items():
+                logger.debug("  話者置換: \"%s\" → \"%s\"、%d件の置換", old_name, new_name, replacement_counts[old_name])
 
         # 全体の置換結果サマリーをログに記録
         total_replacements = sum(replacement_counts.values())
@@ -193,6 +355,8 @@ class SpeakerRemapperBase:
             if count == 0:
                 logger.warning(f"警告: 話者「{old_name}」は定義されていますが、テキスト内での置換はありませんでした")
 
+        if total_replacements == 0:
+            return transcript_text
         return result_text
 
     def _parse_mapping_response(self, ai_response: str) -> Dict[str, str]:
@@ -215,15 +379,18 @@ class SpeakerRemapperBase:
             logger.debug(f"AIレスポンス全体: {ai_response}")
 
         # JSONブロックを抽出
-        json_match = re.search(r'```json\s*(.*?)\s*```', ai_response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
+        # 正規表現を使わず、区切り文字の位置を探して切り出す
+        block_start = ai_response.find(_JSON_FENCE)
+        block_end = ai_response.find(_FENCE, block_start + len(_JSON_FENCE)) if block_start >= 0 else -1
+        if block_end >= 0:
+            json_str = ai_response[block_start + len(_JSON_FENCE):block_end].strip()
             logger.info("```json```ブロックからJSONを抽出しました")
         else:
-            # ```jsonなしの場合、テキスト全体から{}で囲まれた部分を探す
-            json_match = re.search(r'{.*}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
+            # ```jsonなしの場合、テキスト全体から{}で囲まれた部分（最初の{から最後の}まで）を探す
+            brace_start = ai_response.find("{")
+            brace_end = ai_response.rfind("}")
+            if 0 <= brace_start < brace_end:
+                json_str = ai_response[brace_start:brace_end + 1]
                 logger.info("{}で囲まれたJSON形式のテキストを抽出しました")
             else:
                 logger.warning("JSONフォーマットが見つかりませんでした。レスポンス全体をJSONとして解析します。")
@@ -234,27 +401,25 @@ class SpeakerRemapperBase:
 
         try:
             # JSONパース
-            mapping = json.loads(json_str)
+            mapping = orjson.loads(json_str)
 
-            # マッピングの内容を詳細にログに記録
-            logger.info(f"抽出された話者マッピング ({len(mapping)}件):")
-            for original, remapped in mapping.items():
-                logger.info(f"  - \"{original}\" → \"{remapped}\"")
+            # マッピングの内容を記録（各項目はDEBUGレベルでのみ出力する）
+            logger.info(f"抽出された話者マッピング ({len(mapping)}件)")
+            if logger.isEnabledFor(logging.DEBUG):
+                for original, remapped in mapping.items():
+                    logger.debug("  - \"%s\" → \"%s\"", original, remapped)
 
-            # 同じ話者名にマッピングされているケースを検出して警告
-            value_counts = {}
-            for v in mapping.values():
-                value_counts[v] = value_counts.get(v, 0) + 1
+            # 同じ話者名にマッピングされているケースを検出して警告（マッピングを1回だけ走査して逆引きを作る）
+            originals_by_value = defaultdict(list)
+            for original, remapped in mapping.items():
+                originals_by_value[remapped].append(original)
+            duplicates = {value: originals for value, originals in originals_by_value.items() if len(originals) > 1}
 
             # 重複マッピングがある場合は強調して警告
-            duplicates_found = False
-            for value, count in value_counts.items():
-                if count > 1:
-                    duplicates_found = True
-                    duplicated = [k for k, v in mapping.items() if v == value]
-                    logger.warning(f"⚠⚠⚠ 警告: {count}人の話者が同じ名前「{value}」にマッピングされています: {', '.join(duplicated)}")
-
-            if duplicates_found:
+            for value, duplicated in duplicates.items():
+                logger.warning(f"⚠⚠⚠ 警告: {len(duplicated)}人の話者が同じ名前「{value}」にマッピングされています: {', '.join(duplicated)}")
+
+            if duplicates:
                 logger.warning("複数の話者が同じ名前にマッピングされています。これは全員同じ話者に変換されることを意味します。")
                 logger.warning("プロンプトを修正するか、手動でマッピングを調整することをお勧めします。")
 
@@ -264,7 +429,7 @@ class SpeakerRemapperBase:
                 logger.warning(f"警告: 以下の話者は空の値にマッピングされています: {', '.join(empty_mappings)}")
 
             return mapping
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON解析エラー: {e}")
             logger.error(f"解析に失敗したJSON文字列: {json_str}")
             # エラーの詳細を表示
@@ -278,33 +443,22 @@ class SpeakerRemapperBase:
 class GeminiSpeakerRemapper(SpeakerRemapperBase):
     """Gemini APIを使用した話者リマッパー"""
 
-    def _get_speaker_mapping(self, transcript_text: str) -> Dict[str, str]:
+    def _model_name(self) -> str:
+        return get_gemini_api().minutes_model
+
+    def _call_llm(self, prompt: str) -> str:
         """
-        Gemini APIを使用して話者マッピングを取得する
+        Gemini APIにプロンプトを送信する
 
         Args:
-            transcript_text (str): 文字起こしテキスト
+            prompt (str): プロンプト
 
         Returns:
-            Dict[str, str]: 話者名マッピング辞書
+            str: AIからのレスポンス
         """
-        try:
-            self.gemini_api = GeminiAPI()
-            remap_prompt = self.get_remap_prompt()
-            combined_prompt = f"{remap_prompt}\n\n{transcript_text}"
-
-            # Gemini APIを呼び出し
-            # summarize_minutes はテキスト生成全般に使える
-            ai_response = self.gemini_api.summarize_minutes(combined_prompt, "")
-
-            # レスポンスをパースしてマッピングを返す
-            return self._parse_mapping_response(ai_response)
-        except GeminiAPIError as e:
-            logger.error(f"Gemini API呼び出し中にエラー: {str(e)}")
-            return {}
-        except Exception as e:
-            logger.error(f"話者マッピング取得中に予期せぬエラー: {str(e)}")
-            return {}
+        self.gemini_api = get_gemini_api()
+        # summarize_minutes はテキスト生成全般に使える
+        return self.gemini_api.summarize_minutes(prompt, "")
 
 
 def create_speaker_remapper() -> SpeakerRemapperBase:
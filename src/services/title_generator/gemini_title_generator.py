@@ -1,16 +1,9 @@
 from .base_title_generator import BaseTitleGenerator, TitleGenerationError
-from ...utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError
+from ...utils.new_gemini_api import GeminiAPIError as TranscriptionError, get_gemini_api
+from ...utils.response_cache import ResponseCache
 
-class GeminiTitleGenerator(BaseTitleGenerator):
-    """Google Geminiを使用した会議タイトル生成クラス"""
-    
-    def __init__(self):
-        """Initialize Gemini title generator"""
-        super().__init__()
-        self.gemini_api = GeminiAPI()
-        
-        # タイトル生成用のシステムプロンプト
-        self.system_prompt = """会議の書き起こしからこの会議のメインとなる議題が何だったのかを教えて。
+# タイトル生成用のシステムプロンプト
+SYSTEM_PROMPT = """会議の書き起こしからこの会議のメインとなる議題が何だったのかを教えて。
 出力は以下のJSON形式で返してください：
 {
     "title": "会議のタイトル"
@@ -21,6 +14,18 @@ class GeminiTitleGenerator(BaseTitleGenerator):
     "title": "取引先とカフェの方向性に関する会議"
 }
 """
+
+class GeminiTitleGenerator(BaseTitleGenerator):
+    """Google Geminiを使用した会議タイトル生成クラス"""
+
+    system_prompt = SYSTEM_PROMPT
+    # 同じ書き起こしではAPIを呼ばずに前回のタイトルを使う
+    _title_cache = ResponseCache("meeting_title")
+    
+    def __init__(self):
+        """Initialize Gemini title generator"""
+        super().__init__()
+        self.gemini_api = get_gemini_api()
     
     def generate_title(self, text: str) -> str:
         """
@@ -36,10 +41,17 @@ class GeminiTitleGenerator(BaseTitleGenerator):
             TitleGenerationError: タイトル生成に失敗した場合
         """
         try:
+            cache_key = ResponseCache.make_key(self.gemini_api.title_model, text)
+            title = self._title_cache.get(cache_key)
+            if title is not None:
+                self.logger.info(f"キャッシュ済みのタイトルを使用します: {title}")
+                return title
+
             self.logger.info("Geminiでタイトル生成を開始")
             
             # Gemini APIを使用してタイトルを生成
             title = self.gemini_api.generate_meeting_title(text)
+            self._title_cache.set(cache_key, title)
             
             self.logger.info(f"タイトル生成完了: {title}")
             return title
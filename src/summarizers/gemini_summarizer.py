@@ -1,6 +1,6 @@
 import logging
 from typing import Optional
-from ..utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError
+from ..utils.new_gemini_api import GeminiAPIError as TranscriptionError, get_gemini_api
 from ..utils.summarizer import Summarizer
 # from ..utils.config import config_manager # 削除
 
@@ -12,7 +12,7 @@ class GeminiSummarizer(Summarizer):
     def __init__(self):
         """Initialize Gemini summarizer"""
         super().__init__()
-        self.api = GeminiAPI()
+        self.api = get_gemini_api()
         logger.info("Gemini Summarizerを初期化しました")
 
     def summarize(self, text: str, prompt: str) -> str:
@@ -509,7 +509,9 @@ class SettingsDialog(tk.Toplevel):
                 "transcription": {
                     "method": self.transcription_var.get(),
                     "segment_length_seconds": segment_length,
-                    "enable_speaker_remapping": self.enable_speaker_remapping_var.get()
+                    "enable_speaker_remapping": self.enable_speaker_remapping_var.get(),
+                    # 画面で編集しない項目は現在の設定値を引き継ぐ
+                    "max_parallel_transcriptions": config_manager.get_config().transcription.max_parallel_transcriptions
                 },
                 "summarization": {
                     "model": self.summarization_var.get()
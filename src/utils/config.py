@@ -1,6 +1,7 @@
 #import os
 import json
 import logging
+import orjson
 from pathlib import Path
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
@@ -22,6 +23,7 @@ class TranscriptionConfig(BaseModel):
     method: str = "gemini"
     segment_length_seconds: int = 450
     enable_speaker_remapping: bool = True  # 話者置換処理を有効にするかどうか
+    max_parallel_transcriptions: int = 4  # 同時に文字起こしするセグメント数の上限
 
 class SummarizationConfig(BaseModel):
     """議事録生成設定モデル"""
@@ -66,8 +68,7 @@ class ConfigManager:
         try:
             if self.config_file.exists():
                 logger.info(f"設定ファイルを読み込みます: {self.config_file}")
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    config_data = json.load(f)
+                config_data = orjson.loads(self.config_file.read_bytes())
                 logger.info("設定ファイルの読み込みに成功しました")
                 
                 # 文字起こし設定の詳細なログ
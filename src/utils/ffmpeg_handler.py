@@ -14,12 +14,18 @@ import os
 import sys
 import logging
 import shutil
+import functools
+import collections
 from pathlib import Path
 import subprocess
 import re
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+# エラー時に例外へ含めるFFmpeg標準エラー出力の行数（末尾から）
+STDERR_TAIL_LINES = 50
+
 def get_base_path():
     """
     実行環境に合わせたベースパスを返す。
@@ -96,12 +102,15 @@ def get_ffprobe_path():
     logger.error("ffprobeが見つかりませんでした")
     return None
 
+@functools.lru_cache(maxsize=1)
 def setup_ffmpeg():
     """
     FFmpegの環境設定を行う。
     - FFmpegとffprobeのパスを取得
     - 環境変数を設定（PATH, FFMPEG_BINARY, FFPROBE_BINARY）
-    - pydubの設定を更新
+    - pydubの設定を更新（pydubが読み込み済みの場合のみ）
+
+    設定は1プロセスにつき1回だけ行い、2回目以降はキャッシュした結果を返す。
 
     Returns:
         tuple: (ffmpeg_path, ffprobe_path) - 設定されたパス
@@ -121,14 +130,14 @@ def setup_ffmpeg():
         logger.debug(f"PATHを更新しました: {ffmpeg_dir} を追加")
         
         # pydubのconverter設定
-        try:
+        # アプリ本体はpydubを使わないため、起動時にpydub（とaudioop）を読み込まないようにする
+        # 後から読み込まれた場合も、PATHに追加したFFmpegがpydubによって検出される
+        if "pydub" in sys.modules:
             from pydub import AudioSegment
             AudioSegment.converter = ffmpeg_path
             if ffprobe_path:
                 AudioSegment.ffprobe = ffprobe_path
             logger.debug(f"pydub設定を更新しました: converter={ffmpeg_path}, ffprobe={ffprobe_path}")
-        except ImportError:
-            logger.warning("pydubのインポートに失敗しました。AudioSegment設定はスキップします。")
         
         # 環境変数の設定
         os.environ["FFMPEG_BINARY"] = ffmpeg_path
@@ -142,6 +151,40 @@ def setup_ffmpeg():
         logger.error(f"FFmpeg設定中にエラーが発生しました: {str(e)}", exc_info=True)
         raise
 
+def run_ffmpeg(cmd, **popen_kwargs):
+    """
+    FFmpegを実行し、標準エラー出力をメモリに溜めずに1行ずつログへ流す
+
+    Args:
+        cmd (list | str): 実行するコマンド
+        **popen_kwargs: subprocess.Popenに渡す追加の引数
+
+    Raises:
+        subprocess.CalledProcessError: FFmpegが異常終了した場合（stderrには出力の末尾のみを含む）
+    """
+    tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        **popen_kwargs
+    ) as process:
+        # 進捗表示の\rもユニバーサル改行モードで行区切りとして扱われる
+        for line in process.stderr:
+            line = line.rstrip()
+            if not line:
+                continue
+            tail.append(line)
+            if debug_enabled:
+                logger.debug(f"FFmpeg: {line}")
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr="\n".join(tail))
+
 def extract_audio(input_file, output_file):
     """
     動画ファイルから音声を抽出する（非推奨）
@@ -241,20 +284,19 @@ def get_media_duration(input_file):
         logger.error(f"メディア長取得エラー: {str(e)}")
         return -1
 
-def split_media_fixed_duration(input_file, output_dir, segment_duration_sec, file_extension=None):
+def _prepare_segmentation(input_file, output_dir, segment_duration_sec, file_extension=None):
     """
-    メディアファイル（動画/音声）を固定秒数で分割する
-    
+    メディア分割の準備を行い、FFmpegコマンドを組み立てる
+
     Args:
         input_file (str): 入力メディアファイルのパス
         output_dir (str): 出力ディレクトリのパス
         segment_duration_sec (int): 分割する長さ（秒）
         file_extension (str, optional): 出力ファイルの拡張子。指定しない場合は入力ファイルと同じ拡張子を使用
-        
+
     Returns:
-        list: 分割されたメディアファイルのパスのリスト
+        tuple: (FFmpegコマンド, 出力ディレクトリ, ファイル名の接頭辞, 拡張子, 予想セグメント数)
     """
-    print ("通ったよ")
     ffmpeg_path = get_ffmpeg_path()
     if not ffmpeg_path:
         logger.error("FFmpegが見つかりません。メディア分割は実行できません。")
@@ -294,28 +336,47 @@ def split_media_fixed_duration(input_file, output_dir, segment_duration_sec, fil
     num_segments = int(duration / segment_duration_sec) + (1 if duration % segment_duration_sec > 0 else 0)
     logger.info(f"予想セグメント数: {num_segments}")
     
+    # セグメントフォーマットの指定。Windows対応のためにパスの区切り文字に注意
+    segment_format = str(output_path / f"{prefix}_segment_%03d{file_extension}")
+    
+    # FFmpegコマンドの構築 - キーフレームに依存せず正確に分割するオプションを追加
+    cmd = [
+        ffmpeg_path,
+        "-i", str(input_path),
+        "-f", "segment",
+        "-segment_time", str(segment_duration_sec),
+        "-reset_timestamps", "1",
+        "-map", "0",  # すべてのストリームをマップ
+        "-c", "copy",  # ストリームをそのままコピー
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_duration_sec})",  # 指定した間隔で強制的にキーフレームを挿入
+        "-break_non_keyframes", "1",  # キーフレームでなくても分割を許可
+        "-segment_time_delta", "0.05",  # 許容誤差を少なめに設定（0.05秒）
+        segment_format
+    ]
+    return cmd, output_path, prefix, file_extension, num_segments
+
+
+def split_media_fixed_duration(input_file, output_dir, segment_duration_sec, file_extension=None):
+    """
+    メディアファイル（動画/音声）を固定秒数で分割する
+    
+    Args:
+        input_file (str): 入力メディアファイルのパス
+        output_dir (str): 出力ディレクトリのパス
+        segment_duration_sec (int): 分割する長さ（秒）
+        file_extension (str, optional): 出力ファイルの拡張子。指定しない場合は入力ファイルと同じ拡張子を使用
+        
+    Returns:
+        list: 分割されたメディアファイルのパスのリスト
+    """
+    cmd, output_path, prefix, file_extension, num_segments = _prepare_segmentation(
+        input_file, output_dir, segment_duration_sec, file_extension
+    )
+    
     # 分割されたファイルのパスを保存するリスト
     segment_files = []
     
     try:
-        # セグメントフォーマットの指定。Windows対応のためにパスの区切り文字に注意
-        segment_format = str(output_path / f"{prefix}_segment_%03d{file_extension}")
-        
-        # FFmpegコマンドの構築 - キーフレームに依存せず正確に分割するオプションを追加
-        cmd = [
-            ffmpeg_path,
-            "-i", str(input_path),
-            "-f", "segment",
-            "-segment_time", str(segment_duration_sec),
-            "-reset_timestamps", "1",
-            "-map", "0",  # すべてのストリームをマップ
-            "-c", "copy",  # ストリームをそのままコピー
-            "-force_key_frames", f"expr:gte(t,n_forced*{segment_duration_sec})",  # 指定した間隔で強制的にキーフレームを挿入
-            "-break_non_keyframes", "1",  # キーフレームでなくても分割を許可
-            "-segment_time_delta", "0.05",  # 許容誤差を少なめに設定（0.05秒）
-            segment_format
-        ]
-        
         logger.debug(f"FFmpeg分割コマンド: {' '.join(cmd)}")
         
         # FFmpegを実行
@@ -356,4 +417,75 @@ def split_media_fixed_duration(input_file, output_dir, segment_duration_sec, fil
         raise RuntimeError(f"メディア分割に失敗しました: {e.stderr}")
     except Exception as e:
         logger.error(f"メディア分割エラー: {str(e)}")
-        raise RuntimeError(f"メディア分割に失敗しました: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"メディア分割に失敗しました: {str(e)}")
+
+
+def iter_media_segments(input_file, output_dir, segment_duration_sec, file_extension=None):
+    """
+    メディアファイル（動画/音声）を固定秒数で分割し、書き出しが完了したセグメントのパスを順に返す
+
+    FFmpegのセグメントリストを標準出力に書き出させ、分割全体の完了を待たずに
+    完成したセグメントから後続の処理を始められるようにする
+
+    Args:
+        input_file (str): 入力メディアファイルのパス
+        output_dir (str): 出力ディレクトリのパス
+        segment_duration_sec (int): 分割する長さ（秒）
+        file_extension (str, optional): 出力ファイルの拡張子。指定しない場合は入力ファイルと同じ拡張子を使用
+
+    Yields:
+        str: 完成したセグメントファイルのパス（セグメント順）
+    """
+    cmd, output_path, _, _, num_segments = _prepare_segmentation(
+        input_file, output_dir, segment_duration_sec, file_extension
+    )
+    # 完成したセグメントのファイル名を1行ずつ標準出力へ書き出させる
+    cmd[-1:-1] = ["-segment_list", "pipe:1", "-segment_list_type", "flat"]
+    logger.debug(f"FFmpeg分割コマンド: {' '.join(cmd)}")
+
+    # stderrはパイプの詰まりを避けるため一時ファイルに受け、エラー時のみ読み出す
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                encoding='utf-8'
+            )
+        except OSError as e:
+            logger.error(f"メディア分割エラー: {str(e)}")
+            raise RuntimeError(f"メディア分割に失敗しました: {str(e)}")
+
+        count = 0
+        finished = False
+        try:
+            for line in process.stdout:
+                name = line.strip()
+                if not name:
+                    continue
+                count += 1
+                segment_file = str(output_path / name)
+                logger.info(f"セグメント {count}: {segment_file}")
+                yield segment_file
+            finished = True
+        finally:
+            process.stdout.close()
+            # 呼び出し側が途中で処理を打ち切った場合はFFmpegを停止する
+            if not finished and process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', errors='replace')
+            logger.error(f"FFmpegエラー: {stderr}")
+            logger.error(f"FFmpegコマンド: {cmd}")
+            logger.error(f"FFmpeg終了コード: {returncode}")
+            raise RuntimeError(f"メディア分割に失敗しました: {stderr}")
+
+    logger.info(f"メディア分割が完了しました。合計 {count} 個のセグメントを作成")
+    # 予期しないセグメント数の場合は警告
+    if count != num_segments:
+        logger.warning(f"予想セグメント数（{num_segments}）と実際のセグメント数（{count}）が一致しません。")
@@ -0,0 +1,71 @@
+import functools
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_load_json(path: str, mtime: int) -> Any:
+    """JSONファイルを解析する（パスと更新時刻をキーにキャッシュ）"""
+    logger.debug(f"JSONファイルを読み込みます: {path}")
+    return orjson.loads(Path(path).read_bytes())
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_read_text(path: str, mtime: int, encodings: Tuple[str, ...] = ('utf-8',)) -> str:
+    """テキストファイルを読み込む（パスと更新時刻をキーにキャッシュ）"""
+    logger.debug(f"テキストファイルを読み込みます: {path}")
+    # ディスクからは1回だけ読み込み、文字コードを順に試す
+    raw = Path(path).read_bytes()
+    for encoding in encodings[:-1]:
+        try:
+            return _decode(raw, encoding)
+        except UnicodeDecodeError:
+            logger.debug(f"{encoding}でのデコードに失敗しました: {path}")
+    return _decode(raw, encodings[-1])
+
+
+def _decode(raw: bytes, encoding: str) -> str:
+    """バイト列をデコードし、テキストモードでの読み込みと同じく改行をLFに揃える"""
+    text = raw.decode(encoding)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def load_json(path) -> Any:
+    """
+    JSONファイルを読み込む
+    ファイルが更新されていなければ前回の解析結果を返すため、戻り値は変更しないこと
+
+    Args:
+        path: JSONファイルのパス
+
+    Returns:
+        Any: 解析済みのJSONデータ
+    """
+    path = os.fspath(path)
+    return _cached_load_json(path, os.stat(path).st_mtime_ns)
+
+
+def read_text(path, encoding: str = 'utf-8', fallback_encoding: Optional[str] = None) -> str:
+    """
+    テキストファイルを読み込む
+    ファイルが更新されていなければ前回読み込んだ内容を返す
+
+    Args:
+        path: テキストファイルのパス
+        encoding: 文字コード
+        fallback_encoding: encodingでデコードできない場合に使う文字コード
+
+    Returns:
+        str: ファイルの内容
+    """
+    path = os.fspath(path)
+    encodings = (encoding, fallback_encoding) if fallback_encoding else (encoding,)
+    return _cached_read_text(path, os.stat(path).st_mtime_ns, encodings)
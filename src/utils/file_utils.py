@@ -1,7 +1,52 @@
 import os
 #import json
 import re
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Set
+
+# 書き出し時のバッファサイズ（1MiB）
+WRITE_BUFFER_SIZE = 1 << 20
+
+# ファイル名に含まれるタイムスタンプ（_YYYYMMDDhhmmss）
+TIMESTAMP_PATTERN = re.compile(r'_(\d{14})')
+
+# 作成済みを確認したディレクトリ（プロセス内で同じディレクトリのmkdirを繰り返さない）
+_ensured_dirs: Set[Path] = set()
+
+
+def extract_timestamp(path) -> Optional[str]:
+    """ファイル名からタイムスタンプ（YYYYMMDDhhmmss形式）を抽出する（見つからない場合はNone）"""
+    match = TIMESTAMP_PATTERN.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def ensure_dir(path) -> None:
+    """ディレクトリが存在することを保証する（確認済みのディレクトリは再確認しない）"""
+    path = Path(path)
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
+
+
+def write_text(path, text: str, encoding: str = 'utf-8') -> None:
+    """
+    親ディレクトリを用意した上で、大きなバッファでテキストを書き出す
+    Args:
+        path: 出力先ファイルパス
+        text: 書き出すテキスト
+        encoding: 文字コード
+    """
+    path = Path(path)
+    ensure_dir(path.parent)
+    try:
+        f = open(path, 'w', encoding=encoding, buffering=WRITE_BUFFER_SIZE)
+    except FileNotFoundError:
+        # 確認後にディレクトリが削除されていた場合は作り直す
+        _ensured_dirs.discard(path.parent)
+        ensure_dir(path.parent)
+        f = open(path, 'w', encoding=encoding, buffering=WRITE_BUFFER_SIZE)
+    with f:
+        f.write(text)
 
 class FileUtils:
     def get_meeting_title(self, file_path: str) -> str:
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List, Union, Iterator
 import json
 import time
+import threading
 import httplib2
 
 from google import genai
@@ -517,4 +518,33 @@ JSON形式で。
         except Exception as e:
             error_msg = f"議事録生成に失敗しました: {str(e)}"
             logger.error(error_msg)
-            raise GeminiAPIError(error_msg) 
\ No newline at end of file
+            raise GeminiAPIError(error_msg)
+
+
+_shared_api_lock = threading.Lock()
+_shared_api: Optional[GeminiAPI] = None
+_shared_api_settings_mtime: Optional[int] = None
+
+
+def get_gemini_api() -> GeminiAPI:
+    """共有のGeminiAPIクライアントを取得する
+
+    クライアントの初期化（設定の読み込みと接続の確立）を呼び出しごとに行わないよう使い回す。
+    APIキーやモデル設定が変更された場合に備え、設定ファイルが更新されていれば作り直す。
+
+    Returns:
+        GeminiAPI: 共有のクライアント
+
+    Raises:
+        GeminiAPIError: クライアントの初期化に失敗した場合
+    """
+    global _shared_api, _shared_api_settings_mtime
+    try:
+        mtime = os.stat(config_manager.config_file).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _shared_api_lock:
+        if _shared_api is None or mtime != _shared_api_settings_mtime:
+            _shared_api = GeminiAPI()
+            _shared_api_settings_mtime = mtime
+        return _shared_api
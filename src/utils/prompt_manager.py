@@ -1,10 +1,12 @@
 import json
 import logging
+import orjson
 import os
 from pathlib import Path
 from typing import Dict, Optional
 import sys
 from .path_resolver import get_config_file_path, resolve_resource_path
+from .file_cache import load_json, read_text
 
 logger = logging.getLogger(__name__)
 
@@ -155,9 +157,7 @@ class PromptManager:
                 logger.debug(f"パスが存在するか: {prompt_path.exists()}")
                 
                 if prompt_path.exists():
-                    with open(prompt_path, 'r', encoding='utf-8') as f:
-                        prompt = f.read().strip()
-                    return prompt
+                    return read_text(prompt_path).strip()
             return ""
         except Exception as e:
             logger.error(f"デフォルトプロンプト取得中にエラーが発生しました: {str(e)}")
@@ -174,7 +174,10 @@ class PromptManager:
             Optional[str]: カスタムプロンプトテキスト（設定されていない場合はNone）
         """
         try:
-            config = self._load_config()
+            # 読み取り専用のため、更新されていなければキャッシュ済みの設定を使う
+            if not self.config_file.exists():
+                return None
+            config = load_json(self.config_file)
             return config.get("prompts", {}).get(prompt_type)
         except Exception as e:
             logger.error(f"カスタムプロンプト取得中にエラーが発生しました: {str(e)}")
@@ -190,8 +193,7 @@ class PromptManager:
         try:
             logger.debug(f"設定ファイルを読み込みます: {self.config_file}")
             if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = orjson.loads(self.config_file.read_bytes())
                 logger.debug(f"設定ファイルを読み込みました: {len(config)} 項目")
                 return config
             logger.debug("設定ファイルが存在しないため、空の設定を返します")
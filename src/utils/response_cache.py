@@ -0,0 +1,86 @@
+"""
+AI応答のディスクキャッシュ
+
+同じ入力（プロンプト＋テキスト）に対するAPI呼び出しを省略するため、
+入力のSHA-256をキーに応答を保存する。件数は上限を超えると古いものから削除する。
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+from .path_resolver import get_app_config_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 128
+
+
+class ResponseCache:
+    """入力のハッシュをキーにしたLRUキャッシュ（JSONファイルに永続化）"""
+
+    def __init__(self, name: str, max_entries: int = DEFAULT_MAX_ENTRIES, cache_dir: Optional[Path] = None):
+        """
+        Args:
+            name (str): キャッシュ名（ファイル名に使用）
+            max_entries (int): 保持する最大件数
+            cache_dir (Optional[Path]): 保存先ディレクトリ（省略時は設定ディレクトリ/cache）
+        """
+        self.cache_file = (cache_dir or get_app_config_dir() / "cache") / f"{name}.json"
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Optional[OrderedDict] = None
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """入力文字列からキャッシュキーを作る"""
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part.encode("utf-8")
+            # 区切り位置が異なる入力が同じキーにならないよう長さも含める
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _load(self) -> OrderedDict:
+        """初回アクセス時にキャッシュファイルを読み込む"""
+        if self._entries is None:
+            entries = OrderedDict()
+            try:
+                data = orjson.loads(self.cache_file.read_bytes())
+                if isinstance(data, dict):
+                    entries.update(data)
+            except FileNotFoundError:
+                pass
+            except (OSError, orjson.JSONDecodeError) as e:
+                logger.warning(f"キャッシュファイルを読み込めないため破棄します: {self.cache_file} ({str(e)})")
+            self._entries = entries
+        return self._entries
+
+    def get(self, key: str) -> Any:
+        """キャッシュ済みの値を返す（なければNone）"""
+        with self._lock:
+            entries = self._load()
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """値を保存し、ファイルに書き出す"""
+        with self._lock:
+            entries = self._load()
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                self.cache_file.write_bytes(orjson.dumps(entries))
+            except OSError as e:
+                # キャッシュの保存失敗は処理を止めない
+                logger.warning(f"キャッシュファイルの保存に失敗しました: {self.cache_file} ({str(e)})")
@@ -68,13 +68,12 @@ class VideoCompressor:
         Returns:
             Tuple[Path, bool]: (処理後のファイルパス, 圧縮が行われたかどうか)
         """
-        # ファイルの存在確認
-        if not input_file.exists():
+        # ファイルの存在確認とサイズの取得（statは1回で済ませる）
+        try:
+            file_size = input_file.stat().st_size
+        except FileNotFoundError:
             logger.error(f"入力ファイルが存在しません: {input_file}")
             raise FileNotFoundError(f"入力ファイルが存在しません: {input_file}")
-        
-        # ファイルサイズの取得
-        file_size = input_file.stat().st_size
         logger.info(f"入力ファイルのサイズ: {file_size/GB_IN_BYTES:.2f}GB ({file_size:,} bytes)")
         
         # サイズがしきい値以下の場合、圧縮せずに元のファイルを返す